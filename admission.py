@@ -0,0 +1,159 @@
+"""
+In-process admission control for requests that have to reach Firestore.
+
+``TokenBuckets`` limits how often each client may start Firestore-bound work
+on a route, and ``ConcurrencyGate`` bounds how many requests do that work at
+once, with a short bounded queue in front of it. Anything over either limit
+is shed right away with :class:`AdmissionRejected` instead of piling up
+behind slow reads. Both keep counters for /stats. Limits apply per worker
+process.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class AdmissionRejected(Exception):
+    """A shed request: the HTTP ``status`` to answer with and a ``Retry-After`` hint."""
+
+    def __init__(self, status: int, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_route_limits(value: str, default_burst: int):
+    """
+    Parses ``"get_verse=600:120,search=60"`` into ``{route: (per_minute, burst)}``.
+    A missing burst falls back to ``default_burst``; malformed items are ignored.
+    """
+    limits = {}
+    for item in (value or "").split(","):
+        route, _, limit = item.partition("=")
+        rate, _, burst = limit.partition(":")
+        try:
+            limits[route.strip()] = (float(rate), int(burst) if burst.strip() else default_burst)
+        except ValueError:
+            continue
+    limits.pop("", None)
+    return limits
+
+
+class TokenBuckets:
+    """
+    One token bucket per ``(client, route)``: ``burst`` tokens, refilled at
+    ``per_minute``. A rate of 0 disables limiting for that route. At most
+    ``max_clients`` buckets are kept; the least recently used are dropped,
+    which only ever hands a client a fresh bucket.
+    """
+
+    def __init__(self, per_minute: float, burst: int, route_limits=None, max_clients: int = 10000):
+        self._default = (per_minute, burst)
+        self._route_limits = dict(route_limits or {})
+        self._max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._allowed = 0
+        self._limited = 0
+
+    def take(self, client: str, route: str):
+        per_minute, burst = self._route_limits.get(route, self._default)
+        if per_minute <= 0:
+            return
+
+        key = (client, route)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * per_minute / 60)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                self._allowed += 1
+            else:
+                self._limited += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+
+        if not allowed:
+            raise AdmissionRejected(
+                429, "Too many requests", math.ceil((1 - tokens) * 60 / per_minute)
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "tracked": len(self._buckets),
+            }
+
+
+class ConcurrencyGate:
+    """
+    Lets at most ``max_active`` requests hold a slot. Up to ``max_queued``
+    more wait for at most ``queue_timeout`` seconds; beyond that requests are
+    shed immediately. ``max_active`` of 0 disables the gate.
+    """
+
+    def __init__(self, max_active: int, max_queued: int, queue_timeout: float):
+        self._max_active = max_active
+        self._max_queued = max_queued
+        self._queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_active) if max_active > 0 else None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._admitted = 0
+        self._waited = 0
+        self._shed = 0
+        self._timed_out = 0
+
+    def acquire(self):
+        if self._slots is None:
+            return
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self._queued >= self._max_queued:
+                    self._shed += 1
+                    raise AdmissionRejected(503, "Server busy")
+                self._queued += 1
+            try:
+                acquired = self._slots.acquire(timeout=self._queue_timeout)
+            finally:
+                with self._lock:
+                    self._queued -= 1
+            if not acquired:
+                with self._lock:
+                    self._timed_out += 1
+                raise AdmissionRejected(503, "Server busy")
+            with self._lock:
+                self._waited += 1
+
+        with self._lock:
+            self._active += 1
+            self._admitted += 1
+
+    def release(self):
+        if self._slots is None:
+            return
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_active": self._max_active,
+                "active": self._active,
+                "queued": self._queued,
+                "admitted": self._admitted,
+                "waited": self._waited,
+                "shed": self._shed,
+                "timed_out": self._timed_out,
+            }
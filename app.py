@@ -1,11 +1,33 @@
-from flask import Flask, request, Response
+from flask import Flask, Response, g, has_request_context, request
+import functools
+import hashlib
 import json
 import os
-import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import firebase_admin
 from firebase_admin import credentials, firestore
 from flask_cors import CORS
 
+from admission import AdmissionRejected, ConcurrencyGate, TokenBuckets, parse_route_limits
+from dataset_generation import GenerationTracker
+from records import ChapterText, TopicRecord, verse_text
+from reference_parser import (
+    ARABIC_BOOK_DOCUMENT_OVERRIDES,
+    book_name_candidates,
+    document_book_tokens,
+    format_passage,
+    normalize_book_token,
+    normalize_reference_text,
+    parse_passage,
+    plan_chapter_reads,
+    split_by_chapter,
+)
+from search_index import DEFAULT_INDEX_DIR, SearchIndex, index_path
+from singleflight import SingleFlight
+from synopsis import build_alignment
+
 
 cred = credentials.Certificate("serviceAccountKey.json")
 firebase_admin.initialize_app(cred)
@@ -13,6 +35,11 @@ db = firestore.client()
 
 app = Flask(__name__)
 
+# Concurrent identical Firestore reads (same chapter, topic, book lookup, ...)
+# share one in-flight fetch. Loaded payloads are shared between threads and
+# must not be mutated by the routes.
+_flights = SingleFlight()
+
 
 def _cors_origins():
     configured = os.environ.get("CORS_ORIGINS", "").strip()
@@ -39,9 +66,80 @@ CORS(
 )
 
 
-def _json_response(payload, status=200, cache_seconds=300):
+# Admission control only applies to requests that actually need Firestore:
+# anything served from the response cache, resident chapters or cached book
+# lookups never reaches _admit_firestore, and neither does a request that
+# joins another request's in-flight read. Limits are per worker process.
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", "240") or 0)
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "60") or 1)
+# Header set by the reverse proxy (e.g. X-Forwarded-For); its last hop is the
+# client. Leave unset when clients reach Flask directly, since it is spoofable.
+RATE_LIMIT_CLIENT_HEADER = os.environ.get("RATE_LIMIT_CLIENT_HEADER", "").strip()
+
+_rate_limits = TokenBuckets(
+    RATE_LIMIT_PER_MINUTE,
+    RATE_LIMIT_BURST,
+    route_limits=parse_route_limits(os.environ.get("RATE_LIMIT_ROUTES", ""), RATE_LIMIT_BURST),
+    max_clients=int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "10000") or 10000),
+)
+_firestore_gate = ConcurrencyGate(
+    max_active=int(os.environ.get("MAX_FIRESTORE_REQUESTS", "8") or 0),
+    max_queued=int(os.environ.get("ADMISSION_QUEUE_SIZE", "16") or 0),
+    queue_timeout=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "2") or 0),
+)
+
+
+def _client_address() -> str:
+    if RATE_LIMIT_CLIENT_HEADER:
+        hops = [
+            hop.strip()
+            for hop in request.headers.get(RATE_LIMIT_CLIENT_HEADER, "").split(",")
+            if hop.strip()
+        ]
+        if hops:
+            return hops[-1]
+    return request.remote_addr or "unknown"
+
+
+def _admit_firestore():
+    """
+    Charges the client's token bucket for this route and takes a Firestore
+    slot, once per request. Raises :class:`AdmissionRejected` when shed.
+    Outside a request (offline tools, read-pool threads) it does nothing.
+    """
+    if not has_request_context() or g.get("firestore_admitted"):
+        return
+    _rate_limits.take(_client_address(), request.endpoint or request.path)
+    _firestore_gate.acquire()
+    g.firestore_admitted = True
+
+
+@app.teardown_request
+def _release_firestore_slot(error):
+    if g.pop("firestore_admitted", False):
+        _firestore_gate.release()
+
+
+def _firestore_read(key, fn, *args):
+    """
+    Runs ``fn`` through the single-flight group. Only a request that leads
+    the read is admitted; requests joining an in-flight read just wait for it.
+    """
+    return _flights.do(key, fn, *args, lead=_admit_firestore)
+
+
+def _encode_payload(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False)
+
+
+# Responses are keyed by dataset generation, so HTTP caches only need to be
+# bounded by how quickly clients should notice a new import.
+CACHE_SECONDS = int(os.environ.get("CACHE_SECONDS", "300") or 300)
+
+
+def _json_response(payload, status=200, cache_seconds=CACHE_SECONDS):
     response = Response(
-        json.dumps(payload, ensure_ascii=False),
+        _encode_payload(payload),
         status=status,
         content_type="application/json; charset=utf-8",
     )
@@ -52,6 +150,104 @@ def _json_response(payload, status=200, cache_seconds=300):
     return response
 
 
+@app.errorhandler(AdmissionRejected)
+def _admission_rejected(error):
+    response = _json_response({"error": error.reason}, status=error.status)
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "2048") or 2048)
+# Whole chapters kept resident as compact ChapterText records; 1,189 chapters
+# is a full Bible.
+CHAPTER_CACHE_SIZE = int(os.environ.get("CHAPTER_CACHE_SIZE", "1200") or 1200)
+# Book name resolutions (misses included), the book listing per version and
+# the references document each translation's topics resolve to.
+BOOK_CACHE_SIZE = int(os.environ.get("BOOK_CACHE_SIZE", "4096") or 4096)
+
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+_chapter_cache = OrderedDict()
+_chapter_cache_lock = threading.Lock()
+# Chapter cache keys whose chapter document has no denormalized verses (data
+# uploaded before usfm_parser wrote them); guarded by _chapter_cache_lock.
+_legacy_chapters = OrderedDict()
+_book_cache = OrderedDict()
+_book_cache_lock = threading.Lock()
+
+
+def _clear_dataset_caches():
+    with _response_cache_lock:
+        _response_cache.clear()
+    with _chapter_cache_lock:
+        _chapter_cache.clear()
+        _legacy_chapters.clear()
+    with _book_cache_lock:
+        _book_cache.clear()
+
+
+_generations = GenerationTracker(
+    db,
+    poll_seconds=float(os.environ.get("DATASET_GENERATION_POLL_SECONDS", "30") or 30),
+    listen=os.environ.get("DATASET_GENERATION_LISTEN", "").strip() == "1",
+    on_change=_clear_dataset_caches,
+)
+
+
+def _dataset_cached(references=False):
+    """
+    Caches successful responses of the view in process, keyed by path, query
+    and the dataset generation of the requested translation, and serves them
+    with a generation-bearing ETag so revalidation never touches Firestore.
+
+    Only views that read topics pass ``references=True``: they also key by the
+    generation of the references document, which takes a lookup to resolve.
+    Bible-only views key by the bible generation alone.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            language = kwargs.get("language") or request.args.get("language", "english")
+            version = kwargs.get("version") or request.args.get("version", "kjv")
+            language = _select_bible_language(language)
+            version = _select_bible_version(language, version)
+
+            if references:
+                generation = _generations.token(
+                    language, version, _references_document_id(language, version)
+                )
+            else:
+                generation = str(_generations.bible_generation(language, version))
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), generation)
+            with _response_cache_lock:
+                cached = _response_cache.get(key)
+                if cached is not None:
+                    _response_cache.move_to_end(key)
+
+            if cached is None:
+                response = view(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                etag = f"{generation}-{hashlib.sha1(body).hexdigest()[:16]}"
+                cached = (body, etag)
+                with _response_cache_lock:
+                    _response_cache[key] = cached
+                    while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                        _response_cache.popitem(last=False)
+
+            body, etag = cached
+            response = Response(body, content_type="application/json; charset=utf-8")
+            response.headers["Cache-Control"] = f"public, max-age={CACHE_SECONDS}"
+            response.set_etag(etag)
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
+
+
 """
 @app.route('/<language>/<version>/topics', methods=['GET'])
 def get_topics(language, version):
@@ -71,36 +267,25 @@ def get_topics(language, version):
 
 
 @app.route("/<language>/<version>/topic/<topic_id>", methods=["GET"])
+@_dataset_cached(references=True)
 def get_topic(language, version, topic_id):
-    doc_ref = _topics_collection(language, version).document(topic_id)
-    doc = doc_ref.get()
-    if not doc.exists:
+    data = _load_topic(language, version, topic_id)
+    if data is None:
         return _json_response({"error": "Topic not found"}, status=404)
-
-    data = doc.to_dict() or {}
-    data["id"] = doc.id
     return _json_response(data)
 
 
-_ARABIC_INDIC_DIGIT_TRANSLATION = str.maketrans(
-    {
-        "٠": "0",
-        "١": "1",
-        "٢": "2",
-        "٣": "3",
-        "٤": "4",
-        "٥": "5",
-        "٦": "6",
-        "٧": "7",
-        "٨": "8",
-        "٩": "9",
-    }
-)
+def _fetch_topic(language, version, topic_id):
+    doc = _topics_collection(language, version).document(topic_id).get()
+    if not doc.exists:
+        return None
+    return {**(doc.to_dict() or {}), "id": doc.id}
 
 
-def _normalize_book_token(value: str) -> str:
-    normalized = (value or "").translate(_ARABIC_INDIC_DIGIT_TRANSLATION)
-    return "".join(ch.lower() for ch in normalized if ch.isalnum())
+def _load_topic(language, version, topic_id):
+    return _firestore_read(
+        ("topic", language, version, topic_id), _fetch_topic, language, version, topic_id
+    )
 
 
 def _select_bible_language(language: str) -> str:
@@ -121,303 +306,60 @@ def _select_bible_version(language: str, version: str) -> str:
     return requested_version
 
 
-_ORDINAL_WORDS = {
-    "first": "1",
-    "second": "2",
-    "third": "3",
-    "fourth": "4",
-}
-
-
-_ROMAN_NUMERALS = {
-    "i": "1",
-    "ii": "2",
-    "iii": "3",
-    "iv": "4",
-    "v": "5",
-    "vi": "6",
-    "vii": "7",
-    "viii": "8",
-}
-
-
-_BOOK_SYNONYMS = {
-    "canticles": ["songofsongs", "songofsolomon"],
-    "songofsongs": ["songofsolomon", "canticles"],
-    "songofsolomon": ["songofsongs", "canticles"],
-    "psalm": ["psalms"],
-    "psalms": ["psalm"],
-    # Arabic gospel book names used by the frontend.
-    "متى": ["matthew", "mathew"],
-    "متّى": ["matthew", "mathew"],
-    "مرقس": ["mark"],
-    "لوقا": ["luke"],
-    "يوحنا": ["john"],
-    "يوحنّا": ["john"],
-    # Provide reverse lookups so English documents can match Arabic requests.
-    "matthew": ["متى", "متّى"],
-    "mathew": ["متى", "متّى"],
-    "mark": ["مرقس"],
-    "luke": ["لوقا"],
-    "john": ["يوحنا", "يوحنّا"],
-}
-
-
-def _register_book_synonyms(base_name, *variants):
-    base_token = _normalize_book_token(base_name)
-    if not base_token:
-        return
-    base_synonyms = _BOOK_SYNONYMS.setdefault(base_token, [])
-    for variant in variants:
-        token = _normalize_book_token(variant)
-        if not token or token == base_token:
-            continue
-        if token not in base_synonyms:
-            base_synonyms.append(token)
-        reciprocal = _BOOK_SYNONYMS.setdefault(token, [])
-        if base_token not in reciprocal:
-            reciprocal.append(base_token)
-
-
-_ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES = {
-    "Genesis": ["التكوين", "سفر التكوين"],
-    "Exodus": ["الخروج", "سفر الخروج"],
-    "Leviticus": ["اللاويين"],
-    "Numbers": ["العدد"],
-    "Deuteronomy": ["التثنية"],
-    "Joshua": ["يشوع"],
-    "Judges": ["القضاة"],
-    "Ruth": ["راعوث"],
-    "1 Samuel": [
-        "صموئيل الاول",
-        "صموئيل الأول",
-        "أول صموئيل",
-        "رسالة صموئيل الاول",
-        "١ صموئيل",
-        "1 صموئيل",
-    ],
-    "2 Samuel": [
-        "صموئيل الثاني",
-        "صموئيل الثاني",
-        "ثاني صموئيل",
-        "٢ صموئيل",
-        "2 صموئيل",
-    ],
-    "1 Kings": ["الملوك الاول", "الملوك الأول", "١ الملوك", "1 الملوك"],
-    "2 Kings": ["الملوك الثاني", "الملوك الثاني", "٢ الملوك", "2 الملوك"],
-    "1 Chronicles": [
-        "أخبار الأيام الأول",
-        "اخبار الايام الاول",
-        "١ أخبار الأيام",
-        "1 أخبار الأيام",
-    ],
-    "2 Chronicles": [
-        "أخبار الأيام الثاني",
-        "اخبار الايام الثاني",
-        "٢ أخبار الأيام",
-        "2 أخبار الأيام",
-    ],
-    "Ezra": ["عزرا"],
-    "Nehemiah": ["نحميا"],
-    "Esther": ["أستير", "استير"],
-    "Job": ["أيوب"],
-    "Psalms": ["المزامير", "مزامير"],
-    "Proverbs": ["الأمثال", "امثال"],
-    "Ecclesiastes": ["الجامعة"],
-    "Song of Solomon": ["نشيد الأنشاد", "نشيد الانشاد", "نشيد"],
-    "Isaiah": ["إشعياء", "اشعياء"],
-    "Jeremiah": ["إرميا", "ارميا"],
-    "Lamentations": ["مراثي إرميا", "مراثي ارميا", "المراثي"],
-    "Ezekiel": ["حزقيال"],
-    "Daniel": ["دانيال"],
-    "Hosea": ["هوشع"],
-    "Joel": ["يوئيل"],
-    "Amos": ["عاموس"],
-    "Obadiah": ["عوبديا"],
-    "Jonah": ["يونان"],
-    "Micah": ["ميخا"],
-    "Nahum": ["ناحوم"],
-    "Habakkuk": ["حبقوق"],
-    "Zephaniah": ["صفنيا"],
-    "Haggai": ["حجّي", "حجي"],
-    "Zechariah": ["زكريا"],
-    "Malachi": ["ملاخي"],
-    "Matthew": ["متى", "متّى"],
-    "Mark": ["مرقس"],
-    "Luke": ["لوقا"],
-    "John": ["يوحنا", "يوحنّا"],
-    "Acts": ["أعمال الرسل", "اعمال الرسل"],
-    "Romans": ["رومية", "رسالة رومية"],
-    "1 Corinthians": [
-        "كورنثوس الاولى",
-        "كورنثوس الأولى",
-        "١ كورنثوس",
-        "1 كورنثوس",
-        "رسالة كورنثوس الاولى",
-    ],
-    "2 Corinthians": [
-        "كورنثوس الثانية",
-        "كورنثوس الثانيه",
-        "٢ كورنثوس",
-        "2 كورنثوس",
-        "رسالة كورنثوس الثانية",
-    ],
-    "Galatians": ["غلاطية", "رسالة غلاطية"],
-    "Ephesians": ["أفسس", "افسس", "رسالة أفسس"],
-    "Philippians": ["فيلبي", "رسالة فيلبي"],
-    "Colossians": ["كولوسي", "رسالة كولوسي"],
-    "1 Thessalonians": [
-        "تسالونيكي الاولى",
-        "تسالونيكي الأولى",
-        "١ تسالونيكي",
-        "1 تسالونيكي",
-    ],
-    "2 Thessalonians": [
-        "تسالونيكي الثانية",
-        "تسالونيكي الثانيه",
-        "٢ تسالونيكي",
-        "2 تسالونيكي",
-    ],
-    "1 Timothy": [
-        "تيموثاوس الاولى",
-        "تيموثاوس الأولى",
-        "١ تيموثاوس",
-        "1 تيموثاوس",
-    ],
-    "2 Timothy": [
-        "تيموثاوس الثانية",
-        "تيموثاوس الثانيه",
-        "٢ تيموثاوس",
-        "2 تيموثاوس",
-    ],
-    "Titus": ["تيطس"],
-    "Philemon": ["فيلمون"],
-    "Hebrews": ["العبرانيين", "رسالة العبرانيين"],
-    "James": ["يعقوب", "رسالة يعقوب"],
-    "1 Peter": [
-        "بطرس الاولى",
-        "بطرس الأولى",
-        "١ بطرس",
-        "1 بطرس",
-    ],
-    "2 Peter": [
-        "بطرس الثانية",
-        "بطرس الثانيه",
-        "٢ بطرس",
-        "2 بطرس",
-    ],
-    "1 John": [
-        "يوحنا الاولى",
-        "يوحنا الأولى",
-        "١ يوحنا",
-        "1 يوحنا",
-        "رسالة يوحنا الاولى",
-    ],
-    "2 John": [
-        "يوحنا الثانية",
-        "يوحنا الثانيه",
-        "٢ يوحنا",
-        "2 يوحنا",
-        "رسالة يوحنا الثانية",
-    ],
-    "3 John": [
-        "يوحنا الثالثة",
-        "يوحنا الثالثه",
-        "٣ يوحنا",
-        "3 يوحنا",
-        "رسالة يوحنا الثالثة",
-    ],
-    "Jude": ["يهوذا", "رسالة يهوذا"],
-    "Revelation": ["رؤيا يوحنا", "سفر الرؤيا", "الرؤيا"],
-}
-
-
-for english_name, variants in _ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES.items():
-    _register_book_synonyms(english_name, *variants)
-
-
-_ARABIC_BOOK_DOCUMENT_OVERRIDES = {}
-for english_name, variants in _ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES.items():
-    doc_id = english_name
-    tokens = {_normalize_book_token(english_name)}
-    tokens.update(_normalize_book_token(variant) for variant in variants)
-    for token in tokens:
-        if token:
-            _ARABIC_BOOK_DOCUMENT_OVERRIDES[token] = doc_id
-
-
-def _expand_with_synonyms(tokens):
-    expanded = set()
-    stack = list(tokens)
-    while stack:
-        token = stack.pop()
-        if not token or token in expanded:
-            continue
-        expanded.add(token)
-        for synonym in _BOOK_SYNONYMS.get(token, []):
-            stack.append(synonym)
-    return expanded
-
-
-def _book_name_candidates(name: str):
-    if not name:
-        return set()
-    tokens = set()
-    normalized = _normalize_book_token(name)
-    tokens.add(normalized)
-    tokens.add(re.sub(r"^[0-9]+", "", normalized))
-
-    for word, digit in _ORDINAL_WORDS.items():
-        if normalized.startswith(word):
-            remainder = normalized[len(word) :]
-            tokens.add(digit + remainder)
-            tokens.add(remainder)
-
-    for roman, digit in _ROMAN_NUMERALS.items():
-        if normalized.startswith(roman):
-            remainder = normalized[len(roman) :]
-            tokens.add(digit + remainder)
-            tokens.add(remainder)
-
-    return {token for token in _expand_with_synonyms(tokens) if token}
-
-
-def _document_book_tokens(doc_id: str):
-    parts = (doc_id or "").split(" ")
-    tokens = set()
-    tokens.add(_normalize_book_token(doc_id))
-    if len(parts) > 1:
-        tokens.add(_normalize_book_token(" ".join(parts[1:])))
-    tokens.add(_normalize_book_token(parts[0]))
-    tokens.add(_normalize_book_token(parts[-1]))
-    return {token for token in _expand_with_synonyms(tokens) if token}
+def _book_lookup(kind, language, version, fn, *args):
+    """Runs a book lookup once per dataset generation; ``None`` results are kept too."""
+    key = (kind, language, version) + args + (_generations.bible_generation(language, version),)
+    with _book_cache_lock:
+        if key in _book_cache:
+            _book_cache.move_to_end(key)
+            return _book_cache[key]
+
+    result = _firestore_read(key, fn, language, version, *args)
+    with _book_cache_lock:
+        _book_cache[key] = result
+        while len(_book_cache) > BOOK_CACHE_SIZE:
+            _book_cache.popitem(last=False)
+    return result
 
 
 def _resolve_book_document_id(language: str, version: str, book: str):
+    return _book_lookup("book", language, version, _find_book_document_id, book)
+
+
+def _book_document_ids(language: str, version: str):
+    return _book_lookup("book_documents", language, version, _list_book_document_ids)
+
+
+def _list_book_document_ids(language: str, version: str):
+    collection = db.collection("bibles").document(language).collection(version)
+    return tuple(doc.id for doc in collection.list_documents())
+
+
+def _find_book_document_id(language: str, version: str, book: str):
     collection = db.collection("bibles").document(language).collection(version)
     direct_doc = collection.document(book)
     if direct_doc.get().exists:
         return book
 
-    normalized_book = _normalize_book_token(book)
+    normalized_book = normalize_book_token(book)
     if language and language.lower().startswith("arabic"):
-        override = _ARABIC_BOOK_DOCUMENT_OVERRIDES.get(normalized_book)
+        override = ARABIC_BOOK_DOCUMENT_OVERRIDES.get(normalized_book)
         if override:
             override_doc = collection.document(override)
             if override_doc.get().exists:
                 return override
 
-    candidates = _book_name_candidates(book)
+    candidates = book_name_candidates(book)
     if not candidates:
         return None
 
-    documents = list(collection.list_documents())
-    for doc in documents:
-        prefix = _normalize_book_token(doc.id.split(" ")[0])
+    document_ids = _book_document_ids(language, version)
+    for doc_id in document_ids:
+        prefix = normalize_book_token(doc_id.split(" ")[0])
         if prefix and prefix in candidates:
-            return doc.id
+            return doc_id
 
-    tokenized_docs = [(doc.id, _document_book_tokens(doc.id)) for doc in documents]
+    tokenized_docs = [(doc_id, document_book_tokens(doc_id)) for doc_id in document_ids]
     for doc_id, tokens in tokenized_docs:
         for candidate in candidates:
             for token in tokens:
@@ -429,63 +371,260 @@ def _resolve_book_document_id(language: str, version: str, book: str):
     return None
 
 
-def _extract_verse_text(data):
-    if not isinstance(data, dict):
-        return ""
+def _chapter_document(language, version, book_doc_id, chapter):
+    return (
+        db.collection("bibles")
+        .document(language)
+        .collection(version)
+        .document(book_doc_id)
+        .collection("chapters")
+        .document(str(chapter))
+    )
 
-    text = (data.get("text") or "").strip()
-    if text:
-        return text
 
-    blocks_before = data.get("blocks_before")
-    if isinstance(blocks_before, list):
-        text_parts = []
-        for block in blocks_before:
-            if not isinstance(block, dict):
-                continue
-            part = (block.get("text") or "").strip()
-            if part:
-                text_parts.append(part)
-        if text_parts:
-            return " ".join(text_parts).strip()
+def _load_verses(language, version, book_doc_id, chapter_verses):
+    selection = tuple(
+        (chapter, tuple(verse_numbers)) for chapter, verse_numbers in chapter_verses.items()
+    )
+    key = ("verses", language, version, book_doc_id, selection)
+    return _firestore_read(
+        key, _fetch_verses, language, version, book_doc_id, chapter_verses
+    )
 
-    return ""
 
+def _fetch_verses(language, version, book_doc_id, chapter_verses):
+    """
+    Fetches ``{chapter: verse_numbers}`` with one batched read across chapters
+    and returns ``{chapter: ChapterText}`` holding just those verses, in order.
+    """
+    requested = [
+        (
+            chapter,
+            verse_number,
+            _chapter_document(language, version, book_doc_id, chapter)
+            .collection("verses")
+            .document(str(verse_number)),
+        )
+        for chapter, verse_numbers in chapter_verses.items()
+        for verse_number in verse_numbers
+    ]
+    snapshots = {
+        snapshot.reference.path: snapshot
+        for snapshot in db.get_all([verse_ref for _, _, verse_ref in requested])
+    }
 
-def _build_verse_payload(verse_identifier, data):
-    try:
-        verse_number = int(verse_identifier)
-    except (TypeError, ValueError):
-        verse_number = verse_identifier
+    verses = {}
+    for chapter, verse_number, verse_ref in requested:
+        snapshot = snapshots.get(verse_ref.path)
+        data = snapshot.to_dict() if snapshot is not None and snapshot.exists else {}
+        verses.setdefault(chapter, []).append((verse_number, verse_text(data)))
     return {
-        "verse": verse_number,
-        "text": _extract_verse_text(data),
+        chapter: ChapterText.from_verses(chapter_verses, sort=False)
+        for chapter, chapter_verses in verses.items()
     }
 
 
-def _load_single_verse(language, version, book_doc_id, chapter, verse_identifier):
-    verse_ref = (
-        db.collection("bibles")
-        .document(language)
-        .collection(version)
-        .document(book_doc_id)
-        .collection("chapters")
-        .document(str(chapter))
-        .collection("verses")
-        .document(str(verse_identifier))
+def _chapter_cache_key(language, version, book_doc_id, chapter):
+    generation = _generations.bible_generation(language, version)
+    return (language, version, book_doc_id, str(chapter), generation)
+
+
+def _resident_chapter(language, version, book_doc_id, chapter):
+    key = _chapter_cache_key(language, version, book_doc_id, chapter)
+    with _chapter_cache_lock:
+        chapter_text = _chapter_cache.get(key)
+        if chapter_text is not None:
+            _chapter_cache.move_to_end(key)
+        return chapter_text
+
+
+def _load_chapter_verses(language, version, book_doc_id, chapter):
+    """Returns the whole chapter as a :class:`ChapterText`, resident per generation."""
+    key = _chapter_cache_key(language, version, book_doc_id, chapter)
+    with _chapter_cache_lock:
+        chapter_text = _chapter_cache.get(key)
+        if chapter_text is not None:
+            _chapter_cache.move_to_end(key)
+            return chapter_text
+
+    chapter_text = _firestore_read(
+        ("chapter",) + key,
+        _fetch_chapter_verses,
+        language,
+        version,
+        book_doc_id,
+        chapter,
+    )
+    _keep_resident(key, chapter_text)
+    return chapter_text
+
+
+def _keep_resident(key, chapter_text):
+    with _chapter_cache_lock:
+        _chapter_cache[key] = chapter_text
+        while len(_chapter_cache) > CHAPTER_CACHE_SIZE:
+            _chapter_cache.popitem(last=False)
+
+
+def _is_legacy_chapter(key):
+    with _chapter_cache_lock:
+        return key in _legacy_chapters
+
+
+# Read chapters, and the verse ranges inside them, from the one denormalized
+# chapter document usfm_parser writes. Chapters without it, or every chapter
+# when set to 0, are read from the per-verse documents.
+DENORMALIZED_CHAPTERS = os.environ.get("DENORMALIZED_CHAPTERS", "1").strip() != "0"
+
+
+def _fetch_chapter_verses(language, version, book_doc_id, chapter):
+    if DENORMALIZED_CHAPTERS:
+        chapter_text = _fetch_denormalized_chapter(language, version, book_doc_id, chapter)
+        if chapter_text is not None:
+            return chapter_text
+
+    chapter_ref = _chapter_document(language, version, book_doc_id, chapter)
+    return ChapterText.from_verses(
+        (doc.id, verse_text(doc.to_dict()))
+        for doc in chapter_ref.collection("verses").stream()
     )
-    verse_doc = verse_ref.get()
-    data = verse_doc.to_dict() if verse_doc.exists else {}
-    return _build_verse_payload(verse_identifier, data)
+
+
+def _fetch_denormalized_chapter(language, version, book_doc_id, chapter):
+    """
+    Reads the chapter document's verse arrays into a :class:`ChapterText`.
+    Returns ``None``, and remembers the chapter as legacy so the document is
+    not read again this generation, when it has none.
+    """
+    key = _chapter_cache_key(language, version, book_doc_id, chapter)
+    if _is_legacy_chapter(key):
+        return None
+
+    doc = _chapter_document(language, version, book_doc_id, chapter).get(
+        field_paths=["verse_ids", "verse_texts"]
+    )
+    data = (doc.to_dict() or {}) if doc.exists else {}
+    verse_ids = data.get("verse_ids")
+    verse_texts = data.get("verse_texts")
+    if (
+        isinstance(verse_ids, list)
+        and isinstance(verse_texts, list)
+        and verse_ids
+        and len(verse_ids) == len(verse_texts)
+    ):
+        return ChapterText.from_verses(zip(verse_ids, verse_texts))
+
+    with _chapter_cache_lock:
+        _legacy_chapters[key] = True
+        while len(_legacy_chapters) > CHAPTER_CACHE_SIZE:
+            _legacy_chapters.popitem(last=False)
+    return None
+
+
+def _load_denormalized_chapter(language, version, book_doc_id, chapter):
+    """Like :func:`_load_chapter_verses`, but ``None`` for legacy chapters."""
+    key = _chapter_cache_key(language, version, book_doc_id, chapter)
+    chapter_text = _firestore_read(
+        ("chapter_document",) + key,
+        _fetch_denormalized_chapter,
+        language,
+        version,
+        book_doc_id,
+        chapter,
+    )
+    if chapter_text is not None:
+        _keep_resident(key, chapter_text)
+    return chapter_text
+
+
+_read_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("FIRESTORE_READ_THREADS", "8") or 8),
+    thread_name_prefix="firestore-read",
+)
+
+
+def _load_passage(language, version, book_doc_id, plan):
+    """
+    Executes a :func:`plan_chapter_reads` plan into ``{chapter: ChapterText}``.
+
+    Resident chapters are used as they are; other whole chapters are loaded
+    concurrently. Bounded verse selections share one batched read of verse
+    documents, unless DENORMALIZED_CHAPTERS is on: then one chapter document
+    per chapter is cheaper, and it stays resident for later requests.
+    Chapters whose document turns out to have no verse arrays (uploaded
+    before they existed) go back to the batched read.
+    """
+    chapters = {}
+    bounded = {}
+    documents = {}
+    whole = []
+    for chapter, verse_numbers in plan.items():
+        resident = _resident_chapter(language, version, book_doc_id, chapter)
+        if resident is not None:
+            chapters[chapter] = resident
+        elif verse_numbers is None:
+            whole.append(chapter)
+        elif DENORMALIZED_CHAPTERS and not _is_legacy_chapter(
+            _chapter_cache_key(language, version, book_doc_id, chapter)
+        ):
+            documents[chapter] = verse_numbers
+        else:
+            bounded[chapter] = verse_numbers
+
+    if len(documents) + len(whole) == 1:
+        # A single chapter is read in the request, where only a single-flight
+        # leader is admitted.
+        for chapter in documents:
+            chapter_text = _load_denormalized_chapter(language, version, book_doc_id, chapter)
+            if chapter_text is None:
+                bounded[chapter] = documents[chapter]
+            else:
+                chapters[chapter] = chapter_text
+        for chapter in whole:
+            chapters[chapter] = _load_chapter_verses(language, version, book_doc_id, chapter)
+        documents = {}
+        whole = []
+    elif documents or whole:
+        # The read pool runs outside the request, so admit before fanning out.
+        _admit_firestore()
+    chapter_futures = {
+        chapter: _read_executor.submit(
+            _load_chapter_verses, language, version, book_doc_id, chapter
+        )
+        for chapter in whole
+    }
+    document_futures = {
+        chapter: _read_executor.submit(
+            _load_denormalized_chapter, language, version, book_doc_id, chapter
+        )
+        for chapter in documents
+    }
+    for chapter, future in document_futures.items():
+        chapter_text = future.result()
+        if chapter_text is None:
+            bounded[chapter] = documents[chapter]
+        else:
+            chapters[chapter] = chapter_text
+    if bounded:
+        chapters.update(_load_verses(language, version, book_doc_id, bounded))
+    for chapter, future in chapter_futures.items():
+        chapters[chapter] = future.result()
+    return chapters
+
+
+# Guards against specs such as "1-100000" turning into one enormous batch.
+MAX_PASSAGE_VERSES = 500
+MAX_PASSAGE_CHAPTERS = 30
 
 
 @app.route("/get_verse", methods=["GET"])
+@_dataset_cached()
 def get_verse():
     language = request.args.get("language")
     version = request.args.get("version")
     requested_book = request.args.get("book")
     chapter = request.args.get("chapter")
-    verse = request.args.get("verse")  # Can be "1" or "1-3"
+    verse = request.args.get("verse")  # "1", "1-3", "6-8,15", "١-٣"
 
     language = _select_bible_language(language)
     version = _select_bible_version(language, version)
@@ -493,6 +632,28 @@ def get_verse():
     if not all([language, version, requested_book, chapter, verse]):
         return _json_response({"error": "Missing params"}, status=400)
 
+    try:
+        chapter_number = int(normalize_reference_text(chapter))
+        spans = parse_passage(verse, chapter_number)
+    except ValueError:
+        return _json_response({"error": "Invalid verse range"}, status=400)
+
+    if any(
+        not span.is_single_chapter or span.start_chapter != chapter_number
+        for span in spans
+    ):
+        return _json_response(
+            {"error": "Cross-chapter ranges need /get_passage"},
+            status=400,
+        )
+
+    # Sized arithmetically so huge ranges are rejected before anything is built.
+    if sum(span.verse_count for span in spans) > MAX_PASSAGE_VERSES:
+        return _json_response({"error": "Verse range too large"}, status=400)
+    verse_numbers = list(
+        dict.fromkeys(number for span in spans for number in span.verse_numbers())
+    )
+
     book = _resolve_book_document_id(language, version, requested_book)
     if not book:
         return _json_response(
@@ -500,21 +661,18 @@ def get_verse():
             status=404,
         )
 
-    results = []
-    if "-" in verse:
-        try:
-            start, end = map(int, verse.split("-"))
-        except ValueError:
-            return _json_response({"error": "Invalid verse range"}, status=400)
-        for i in range(start, end + 1):
-            results.append(_load_single_verse(language, version, book, chapter, i))
-    else:
-        results.append(_load_single_verse(language, version, book, chapter, verse))
-
-    return _json_response(results)
+    chapters = _load_passage(language, version, book, {chapter_number: tuple(verse_numbers)})
+    chapter_text = chapters[chapter_number]
+    return _json_response(
+        [
+            {"verse": verse_number, "text": chapter_text.get(verse_number, "")}
+            for verse_number in verse_numbers
+        ]
+    )
 
 
 @app.route("/get_chapter", methods=["GET"])
+@_dataset_cached()
 def get_chapter():
     language = request.args.get("language")
     version = request.args.get("version")
@@ -534,28 +692,140 @@ def get_chapter():
             status=404,
         )
 
-    verses_collection = (
-        db.collection("bibles")
-        .document(language)
-        .collection(version)
-        .document(book)
-        .collection("chapters")
-        .document(str(chapter))
-        .collection("verses")
+    if request.args.get("format", "").strip().lower() == "structured":
+        return _json_response(
+            {
+                "book": book,
+                "chapter": int(chapter) if chapter.isdigit() else chapter,
+                "segments": _load_chapter_structure(language, version, book, chapter),
+            }
+        )
+
+    return _json_response(_load_chapter_verses(language, version, book, chapter).to_payload())
+
+
+def _load_chapter_structure(language, version, book_doc_id, chapter):
+    return _firestore_read(
+        ("structure", language, version, book_doc_id, str(chapter)),
+        _fetch_chapter_structure,
+        language,
+        version,
+        book_doc_id,
+        chapter,
+    )
+
+
+def _fetch_chapter_structure(language, version, book_doc_id, chapter):
+    """
+    Reads the segments usfm_parser precomputed on the chapter document. Chapters
+    uploaded before that existed fall back to a single plain paragraph.
+    """
+    doc = _chapter_document(language, version, book_doc_id, chapter).get(
+        field_paths=["structure"]
     )
+    structure = (doc.to_dict() or {}).get("structure") if doc.exists else None
+    if isinstance(structure, list) and structure:
+        return structure
+
+    verses = _load_chapter_verses(language, version, book_doc_id, chapter).to_payload()
+    if not verses:
+        return []
+    return [{"type": "paragraph", "marker": "p", "content": verses}]
+
+
+@app.route("/get_passage", methods=["GET"])
+@_dataset_cached()
+def get_passage():
+    language = request.args.get("language")
+    version = request.args.get("version")
+    requested_book = request.args.get("book")
+    passage = request.args.get("passage")  # "3:16-4:2", "1:6-8;15-28", "5"
+    chapter = request.args.get("chapter")  # optional context for bare verses
+
+    language = _select_bible_language(language)
+    version = _select_bible_version(language, version)
+
+    if not all([language, version, requested_book, passage]):
+        return _json_response({"error": "Missing params"}, status=400)
+
+    try:
+        chapter_number = int(normalize_reference_text(chapter)) if chapter else None
+        spans = parse_passage(passage, chapter_number)
+    except ValueError:
+        return _json_response({"error": "Invalid passage"}, status=400)
+
+    try:
+        plan = plan_chapter_reads(
+            spans, max_chapters=MAX_PASSAGE_CHAPTERS, max_verses=MAX_PASSAGE_VERSES
+        )
+    except ValueError:
+        return _json_response({"error": "Passage too large"}, status=400)
+
+    book = _resolve_book_document_id(language, version, requested_book)
+    if not book:
+        return _json_response(
+            {"error": f"Unknown book '{requested_book}'"},
+            status=404,
+        )
 
-    verses = []
-    for doc in verses_collection.stream():
-        verses.append(_build_verse_payload(doc.id, doc.to_dict()))
+    chapters = _load_passage(language, version, book, plan)
+    return _json_response(
+        {
+            "book": book,
+            "passage": format_passage(spans),
+            "sections": _passage_sections(chapters, spans),
+        }
+    )
 
-    verses.sort(key=lambda item: item["verse"] if isinstance(item["verse"], int) else 0)
 
-    return _json_response(verses)
+def _passage_sections(chapters, spans):
+    """
+    One section per chapter-sized piece of the passage, in request order, so
+    clients can render chapter breaks and gaps between disjoint ranges.
+    """
+    sections = []
+    for span in spans:
+        for chapter, first_verse, last_verse in split_by_chapter(span):
+            chapter_text = chapters.get(chapter)
+            verses = chapter_text.to_payload(first_verse, last_verse) if chapter_text else []
+            sections.append({"chapter": chapter, "verses": verses})
+    return sections
 
 
 def _topics_collection(language: str, version: str):
     language = _select_bible_language(language)
     version = _select_bible_version(language, version)
+    return (
+        db.collection("references")
+        .document(_references_document_id(language, version))
+        .collection("topics")
+    )
+
+
+def _references_document_id(language: str, version: str) -> str:
+    """
+    Id of the ``references/<id>`` document holding the translation's topics.
+    Resolved once until the dataset generations change, since its references
+    counter is keyed by this id.
+    """
+    key = ("references", language, version)
+    with _book_cache_lock:
+        references_id = _book_cache.get(key)
+        if references_id is not None:
+            _book_cache.move_to_end(key)
+            return references_id
+
+    references_id = _firestore_read(
+        ("topics_collection", language, version), _find_topics_collection, language, version
+    ).parent.id
+    with _book_cache_lock:
+        _book_cache[key] = references_id
+        while len(_book_cache) > BOOK_CACHE_SIZE:
+            _book_cache.popitem(last=False)
+    return references_id
+
+
+def _find_topics_collection(language: str, version: str):
     references = db.collection("references")
 
     def _normalize(value: str) -> str:
@@ -622,6 +892,7 @@ def _topics_collection(language: str, version: str):
 
 
 @app.route("/topics", methods=["GET"])
+@_dataset_cached(references=True)
 def get_topics():
     language = request.args.get("language", "english")
     version = request.args.get("version", "kjv")
@@ -629,25 +900,189 @@ def get_topics():
     language = _select_bible_language(language)
     version = _select_bible_version(language, version)
 
+    return _json_response([topic.to_payload() for topic in _load_topics(language, version)])
+
+
+def _load_topics(language, version):
+    return _firestore_read(("topics", language, version), _fetch_topics, language, version)
+
+
+def _fetch_topics(language, version):
     topics_ref = _topics_collection(language, version)
     topics = []
     for doc in topics_ref.stream():
-        data = doc.to_dict() or {}
         # zero-pad numeric ids, but don't crash if not numeric
         try:
             padded_id = f"{int(doc.id):02}"
         except ValueError:
             padded_id = doc.id
-        topics.append(
-            {
-                "id": padded_id,
-                "name": data.get("name", ""),
-                "references": data.get("entries", []),
-            }
+        topics.append(TopicRecord.from_dict(padded_id, doc.to_dict()))
+
+    topics.sort(key=lambda x: int(x.id) if x.id.isdigit() else x.id)
+    return tuple(topics)
+
+
+def _fetch_synopsis(language, version, topic_id):
+    topics_ref = _topics_collection(language, version)
+    doc = topics_ref.parent.collection("synopsis").document(topic_id).get()
+    if doc.exists:
+        return doc.to_dict() or {}
+
+    # Topics imported before the synopsis stage existed: align on the fly.
+    topic = _load_topic(language, version, topic_id)
+    if topic is None:
+        return None
+    return build_alignment(topic.get("name", ""), topic.get("entries", []))
+
+
+def _load_synopsis(language, version, topic_id):
+    return _firestore_read(
+        ("synopsis", language, version, topic_id), _fetch_synopsis, language, version, topic_id
+    )
+
+
+@app.route("/synopsis/<topic_id>", methods=["GET"])
+@_dataset_cached(references=True)
+def get_synopsis(topic_id):
+    language = request.args.get("language", "english")
+    version = request.args.get("version", "kjv")
+    include_text = request.args.get("text", "").strip() == "1"
+
+    language = _select_bible_language(language)
+    version = _select_bible_version(language, version)
+
+    # /topics zero-pads numeric ids ("01") but documents are stored as "1".
+    if topic_id.isdigit():
+        topic_id = str(int(topic_id))
+
+    synopsis = _load_synopsis(language, version, topic_id)
+    if synopsis is None:
+        return _json_response({"error": "Topic not found"}, status=404)
+
+    payload = {**synopsis, "id": topic_id}
+    if include_text:
+        payload["columns"] = [
+            _synopsis_column_with_text(language, version, column)
+            for column in synopsis.get("columns", [])
+        ]
+    return _json_response(payload)
+
+
+def _synopsis_column_with_text(language, version, column):
+    book = _resolve_book_document_id(language, version, column.get("book", ""))
+    passages = column.get("passages", [])
+    spans = [
+        span
+        for passage in passages
+        for span in parse_passage(passage.get("passage", ""), strict=False)
+    ]
+    if not book or not spans:
+        return column
+
+    # Prefetch exactly the chapters the column needs, then slice per passage.
+    chapters = _load_passage(language, version, book, plan_chapter_reads(spans))
+    with_text = [
+        {
+            **passage,
+            "sections": _passage_sections(
+                chapters, parse_passage(passage.get("passage", ""), strict=False)
+            ),
+        }
+        for passage in passages
+    ]
+    return {**column, "passages": with_text}
+
+
+SEARCH_INDEX_DIR = os.environ.get("SEARCH_INDEX_DIR", DEFAULT_INDEX_DIR)
+MAX_SEARCH_RESULTS = 100
+
+# (language, version) -> (file mtime, dataset generation, SearchIndex)
+_search_indexes = {}
+_search_indexes_lock = threading.Lock()
+
+
+def _search_index(language: str, version: str):
+    """
+    Returns the loaded index, or ``None`` while no index file exists. The index
+    is reloaded when the file is rebuilt or the dataset generation changes.
+    Raises ``ValueError`` for names that are not plain path components and
+    ``RuntimeError`` when the file cannot be loaded; a broken file is not
+    re-read until it changes.
+    """
+    path = index_path(SEARCH_INDEX_DIR, language, version)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    key = (language, version)
+    generation = _generations.bible_generation(language, version)
+    with _search_indexes_lock:
+        cached = _search_indexes.get(key)
+    if cached is not None and cached[:2] == (mtime, generation):
+        if cached[2] is None:
+            raise RuntimeError(f"Search index {path!r} is unreadable")
+        return cached[2]
+
+    # Loading decompresses the whole file; do it outside the lock, once.
+    try:
+        index = _flights.do(("search_index", path, mtime), SearchIndex.load, path)
+    except Exception as exc:
+        app.logger.exception("Could not load search index %s", path)
+        with _search_indexes_lock:
+            _search_indexes[key] = (mtime, generation, None)
+        raise RuntimeError(f"Search index {path!r} is unreadable") from exc
+    with _search_indexes_lock:
+        _search_indexes[key] = (mtime, generation, index)
+    return index
+
+
+@app.route("/search", methods=["GET"])
+def search():
+    language = request.args.get("language")
+    version = request.args.get("version")
+    query = (request.args.get("q") or "").strip()
+
+    language = _select_bible_language(language)
+    version = _select_bible_version(language, version)
+
+    if not all([language, version, query]):
+        return _json_response({"error": "Missing params"}, status=400)
+
+    try:
+        limit = int(request.args.get("limit", "20"))
+    except ValueError:
+        return _json_response({"error": "Invalid limit"}, status=400)
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+
+    try:
+        index = _search_index(language, version)
+    except ValueError:
+        return _json_response({"error": "Invalid language or version"}, status=400)
+    except RuntimeError:
+        return _json_response({"error": "Search index unavailable"}, status=503)
+    if index is None:
+        return _json_response(
+            {"error": f"No search index for '{language}/{version}'"},
+            status=404,
         )
 
-    topics.sort(key=lambda x: int(x["id"]) if x["id"].isdigit() else x["id"])
-    return _json_response(topics)
+    total, hits = index.search(query, limit=limit)
+    return _json_response({"query": query, "total": total, "hits": hits})
+
+
+@app.route("/stats", methods=["GET"])
+def get_stats():
+    return _json_response(
+        {
+            "singleflight": _flights.stats(),
+            "admission": {
+                "rate_limit": _rate_limits.stats(),
+                "firestore": _firestore_gate.stats(),
+            },
+        },
+        cache_seconds=0,
+    )
 
 
 if __name__ == "__main__":
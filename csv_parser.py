@@ -5,6 +5,10 @@ import os, re, csv, io, tempfile, argparse
 import firebase_admin
 from firebase_admin import credentials, storage, firestore
 
+from dataset_generation import bump_references_generation
+from reference_parser import format_span, parse_passage
+from synopsis import build_alignment
+
 # ─── CONFIG ─────────────────────────────────────────────────────────────
 SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
 # For Admin SDK this should be the bucket *name* (often <project-id>.appspot.com).
@@ -32,16 +36,14 @@ def download_csv(remote_path: str) -> str:
     return tmp.name
 
 def parse_refs(cell: str):
-    """'1:6–8;15–28' → [(1,'6-8'), (1,'15-28')] ; also accepts commas/semicolons."""
+    """'1:6–8;15–28' → [(1,'6-8'), (1,'15-28')] ; also accepts commas/semicolons,
+    Arabic-Indic digits, half verses ('4:12-17a') and cross-chapter spans
+    ('3:16-4:2' → [(3,'16-4:2')]). Unparseable pieces are logged and skipped."""
     out = []
-    for piece in re.split(r"[;,]", cell or ""):
-        p = (piece or "").strip().replace("–", "-").replace("—", "-")
-        if ":" not in p:
-            continue
-        chap, verses = p.split(":", 1)
-        chap = chap.strip()
-        if chap.isdigit():
-            out.append((int(chap), verses.strip()))
+    for span in parse_passage(cell or "", strict=False):
+        if span.end_verse is None:
+            continue  # whole-chapter pieces carry no verse selection
+        out.append((span.start_chapter, format_span(span, span.start_chapter)))
     return out
 
 def read_rows_any_encoding(path: str):
@@ -92,19 +94,39 @@ def parse_csv_by_position(path: str) -> dict:
     print(f"✔ Parsed {total_refs} references across {len(result)} topics")
     return result
 
-def push_to_firestore(language: str, data: dict):
+def build_synopsis(data: dict) -> dict:
+    """
+    Returns { topic: alignment } with the precomputed per-gospel passage
+    columns for every topic (see synopsis.build_alignment).
+    """
+    synopsis = {topic: build_alignment(topic, entries) for topic, entries in data.items()}
+    passages = sum(
+        len(column["passages"]) for alignment in synopsis.values() for column in alignment["columns"]
+    )
+    print(f"✔ Aligned {passages} passages across {len(synopsis)} topics")
+    return synopsis
+
+def push_to_firestore(language: str, data: dict, synopsis: dict = None):
     """
     Writes to Firestore: references/<language>/topics/<1..N>
+    and, when given, references/<language>/synopsis/<1..N> (same ids).
     """
     initialize_firebase()
     db = firestore.client()
-    coll = db.collection("references").document(language).collection("topics")
+    language_doc = db.collection("references").document(language)
+    coll = language_doc.collection("topics")
+    synopsis_coll = language_doc.collection("synopsis")
 
     count = 1
     for topic, entries in data.items():
         coll.document(str(count)).set({"name": topic, "entries": entries})
+        if synopsis and topic in synopsis:
+            synopsis_coll.document(str(count)).set(synopsis[topic])
         count += 1
     print(f"✔ Wrote {len(data)} documents → references/{language}/topics")
+    if synopsis:
+        print(f"✔ Wrote {len(synopsis)} documents → references/{language}/synopsis")
+    bump_references_generation(db, language)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -121,7 +143,8 @@ def main():
 
     local_csv = download_csv(args.csv)
     data = parse_csv_by_position(local_csv)
-    push_to_firestore(language, data)
+    synopsis = build_synopsis(data)
+    push_to_firestore(language, data, synopsis)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+"""
+Dataset generation counters shared by the importers and the API.
+
+Every import run bumps a counter in one Firestore document:
+
+    meta/dataset_generations = {
+        "bibles": {<language>: {<version>: n}},
+        "references": {<references document id>: n},
+    }
+
+References are keyed by the ``references/<id>`` document the importer wrote,
+because the API reaches topics through that id, which need not match the
+request's language. app.py reads the counters document (polling or
+``on_snapshot``) and folds the counters into its cache keys and ETags, so a
+finished import invalidates every cached response for the affected
+translation at once.
+"""
+
+import logging
+import threading
+import time
+
+from firebase_admin import firestore
+
+GENERATIONS_COLLECTION = "meta"
+GENERATIONS_DOCUMENT = "dataset_generations"
+
+logger = logging.getLogger(__name__)
+
+
+def generations_document(db):
+    return db.collection(GENERATIONS_COLLECTION).document(GENERATIONS_DOCUMENT)
+
+
+def _key(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def bump_bible_generation(db, language: str, version: str):
+    generations_document(db).set(
+        {"bibles": {_key(language): {_key(version): firestore.Increment(1)}}},
+        merge=True,
+    )
+    print(f"✔ Bumped dataset generation for bibles/{language}/{version}")
+
+
+def bump_references_generation(db, references_id: str):
+    generations_document(db).set(
+        {"references": {_key(references_id): firestore.Increment(1)}},
+        merge=True,
+    )
+    print(f"✔ Bumped dataset generation for references/{references_id}")
+
+
+class GenerationTracker:
+    """
+    Keeps the latest generation counters in memory.
+
+    By default the document is re-read at most once per ``poll_seconds``, by
+    whichever request notices it is due; other requests keep using the last
+    value meanwhile. With ``listen=True`` an ``on_snapshot`` listener pushes
+    updates instead. ``on_change`` is called after the counters change.
+    """
+
+    def __init__(self, db, poll_seconds: float = 30.0, listen: bool = False, on_change=None):
+        self._document = generations_document(db)
+        self._poll_seconds = poll_seconds
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._data = {}
+        self._checked_at = 0.0
+        self._watch = None
+        if listen:
+            self._watch = self._document.on_snapshot(self._on_snapshot)
+
+    def _on_snapshot(self, snapshots, changes, read_time):
+        for snapshot in snapshots:
+            self._update(snapshot.to_dict() if snapshot.exists else {})
+
+    def _update(self, data):
+        with self._lock:
+            changed = data != self._data
+            self._data = data
+            self._checked_at = time.monotonic()
+        if changed and self._on_change is not None:
+            self._on_change()
+
+    def _refresh_if_due(self):
+        if self._watch is not None:
+            return
+        if time.monotonic() - self._checked_at < self._poll_seconds:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            snapshot = self._document.get()
+        except Exception:
+            # Keep serving with the last known counters; retry after the interval.
+            logger.warning("Could not read dataset generations", exc_info=True)
+            self._checked_at = time.monotonic()
+        else:
+            self._update(snapshot.to_dict() if snapshot.exists else {})
+        finally:
+            self._refresh_lock.release()
+
+    def _counters(self):
+        self._refresh_if_due()
+        with self._lock:
+            return self._data
+
+    def bible_generation(self, language: str, version: str) -> int:
+        bibles = (self._counters().get("bibles") or {}).get(_key(language)) or {}
+        return bibles.get(_key(version), 0)
+
+    def token(self, language: str, version: str, references_id: str) -> str:
+        """
+        Returns e.g. ``"3.7"``: the generation of ``bibles/<language>/<version>``
+        and of the ``references/<references_id>`` document its topics live in.
+        """
+        references = self._counters().get("references") or {}
+        return f"{self.bible_generation(language, version)}.{references.get(_key(references_id), 0)}"
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Pre-renders the immutable API responses into a static directory tree.
+
+Every (language, version) topic list, topic document, synopsis table and
+chapter is rendered with the same loaders and JSON encoding as app.py, then
+written as a content-hashed file next to a gzip-precompressed copy:
+
+    <out>/<language>/<version>/topics.<hash>.json(.gz)
+    <out>/<language>/<version>/topic/<id>.<hash>.json(.gz)
+    <out>/<language>/<version>/synopsis/<id>.<hash>.json(.gz)
+    <out>/<language>/<version>/chapters/<book>/<chapter>.<hash>.json(.gz)
+
+``<out>/manifest.json`` maps each request to its file so the frontend can
+skip Flask, which stays in place for anything that is not exported.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+DEFAULT_OUT_DIR = "static_api"
+HASH_LENGTH = 12
+
+
+def _path_component(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(value).strip()) or "_"
+
+
+def _write_artifact(out_dir: str, relative_stem: str, body: str) -> str:
+    """Writes ``body`` under a content-hashed name and returns the relative path."""
+    data = body.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    relative_path = f"{relative_stem}.{digest}.json"
+    path = os.path.join(out_dir, relative_path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mtime=0 keeps the compressed bytes reproducible across exports. The
+        # .gz copy goes first so an existing .json always has its twin.
+        with open(f"{path}.gz", "wb") as raw, gzip.GzipFile(
+            fileobj=raw, mode="wb", compresslevel=9, mtime=0
+        ) as fh:
+            fh.write(data)
+        with open(f"{path}.tmp", "wb") as fh:
+            fh.write(data)
+        os.replace(f"{path}.tmp", path)
+    return relative_path
+
+
+def discover_translations(db):
+    """Yields every (language, version) stored under bibles/."""
+    for language_doc in db.collection("bibles").list_documents():
+        for version_collection in language_doc.collections():
+            yield language_doc.id, version_collection.id
+
+
+def export_translation(app_module, out_dir: str, language: str, version: str):
+    language = app_module._select_bible_language(language)
+    version = app_module._select_bible_version(language, version)
+    encode = app_module._encode_payload
+    base = f"{_path_component(language)}/{_path_component(version)}"
+
+    entry = {"topics": None, "topic": {}, "synopsis": {}, "chapters": {}}
+
+    topics = app_module._load_topics(language, version)
+    entry["topics"] = _write_artifact(
+        out_dir, f"{base}/topics", encode([topic.to_payload() for topic in topics])
+    )
+    for topic in topics:
+        topic_id = str(int(topic.id)) if topic.id.isdigit() else topic.id
+        data = app_module._load_topic(language, version, topic_id)
+        if data is not None:
+            entry["topic"][topic_id] = _write_artifact(
+                out_dir, f"{base}/topic/{_path_component(topic_id)}", encode(data)
+            )
+        synopsis = app_module._load_synopsis(language, version, topic_id)
+        if synopsis is not None:
+            entry["synopsis"][topic_id] = _write_artifact(
+                out_dir,
+                f"{base}/synopsis/{_path_component(topic_id)}",
+                encode({**synopsis, "id": topic_id}),
+            )
+
+    books = app_module.db.collection("bibles").document(language).collection(version)
+    for book_doc in books.list_documents():
+        chapters = {}
+        for chapter_doc in book_doc.collection("chapters").list_documents():
+            verses = app_module._load_chapter_verses(language, version, book_doc.id, chapter_doc.id)
+            chapters[chapter_doc.id] = _write_artifact(
+                out_dir,
+                f"{base}/chapters/{_path_component(book_doc.id)}/{_path_component(chapter_doc.id)}",
+                encode(verses.to_payload()),
+            )
+        if chapters:
+            entry["chapters"][book_doc.id] = chapters
+
+    chapter_count = sum(len(chapters) for chapters in entry["chapters"].values())
+    print(
+        f"✔ Exported {language}/{version}: {len(entry['topic'])} topics, "
+        f"{len(entry['chapters'])} books, {chapter_count} chapters"
+    )
+    return language, version, entry
+
+
+def write_manifest(out_dir: str, translations: dict):
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "translations": translations,
+    }
+    path = os.path.join(out_dir, "manifest.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+    print(f"✔ Wrote manifest for {len(translations)} translations → {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export static, precompressed API artifacts for nginx.")
+    ap.add_argument("--out", default=DEFAULT_OUT_DIR, help="Output directory served by nginx")
+    ap.add_argument(
+        "--translation",
+        action="append",
+        default=None,
+        metavar="LANGUAGE:VERSION",
+        help="Translation to export (repeatable); defaults to everything under bibles/",
+    )
+    args = ap.parse_args()
+
+    # app.py initializes Firebase and owns the loaders the live API uses.
+    import app as app_module
+
+    if args.translation:
+        requested = [tuple(item.split(":", 1)) for item in args.translation if ":" in item]
+    else:
+        requested = list(discover_translations(app_module.db))
+
+    translations = {}
+    for language, version in requested:
+        language, version, entry = export_translation(app_module, args.out, language, version)
+        translations[f"{language}/{version}"] = entry
+    write_manifest(args.out, translations)
+
+
+if __name__ == "__main__":
+    main()
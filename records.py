@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory records for the serving path.
+
+Firestore hands verses and topics back as dicts of dicts. Keeping those
+resident for a whole Bible costs one dict (plus keys and boxed ints) per
+verse in every gunicorn worker. ``ChapterText`` instead stores a chapter as a
+single text buffer with an offset array, and topics use slotted classes.
+JSON payloads are only built at the edge, by the ``to_payload`` methods.
+
+Run this module to compare both representations:
+
+    python3 records.py                 # synthetic Bible-sized corpus
+    python3 records.py Ar-*-nav.usfm   # real chapters parsed from USFM
+"""
+
+import sys
+import tracemalloc
+from array import array
+
+
+def verse_text(data):
+    """Display text of a verse document, falling back to its ``blocks_before`` text."""
+    if not isinstance(data, dict):
+        return ""
+
+    text = (data.get("text") or "").strip()
+    if text:
+        return text
+
+    blocks_before = data.get("blocks_before")
+    if isinstance(blocks_before, list):
+        text_parts = []
+        for block in blocks_before:
+            if not isinstance(block, dict):
+                continue
+            part = (block.get("text") or "").strip()
+            if part:
+                text_parts.append(part)
+        if text_parts:
+            return " ".join(text_parts).strip()
+
+    return ""
+
+
+def _verse_sort_key(verse_id):
+    return verse_id if isinstance(verse_id, int) else 0
+
+
+class ChapterText:
+    """
+    Verses of one chapter: one ``str`` buffer, an ``array`` of end offsets and
+    the verse ids (an ``array`` when every id is numeric, the usual case).
+    """
+
+    __slots__ = ("verse_ids", "offsets", "text")
+
+    def __init__(self, verse_ids, offsets, text):
+        self.verse_ids = verse_ids
+        self.offsets = offsets
+        self.text = text
+
+    @classmethod
+    def from_verses(cls, verses, sort=True):
+        """Builds a chapter from ``(verse_id, text)`` pairs; numeric ids become ints."""
+        items = []
+        for verse_id, text in verses:
+            try:
+                verse_id = int(verse_id)
+            except (TypeError, ValueError):
+                pass
+            items.append((verse_id, text or ""))
+        if sort:
+            items.sort(key=lambda item: _verse_sort_key(item[0]))
+
+        offsets = array("I")
+        position = 0
+        for _, text in items:
+            position += len(text)
+            offsets.append(position)
+
+        ids = [verse_id for verse_id, _ in items]
+        if all(isinstance(verse_id, int) and 0 <= verse_id < 1 << 16 for verse_id in ids):
+            verse_ids = array("H", ids)
+        else:
+            verse_ids = tuple(ids)
+        return cls(verse_ids, offsets, "".join(text for _, text in items))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _text_at(self, index):
+        start = self.offsets[index - 1] if index else 0
+        return self.text[start : self.offsets[index]]
+
+    def get(self, verse_id, default=None):
+        for index, current in enumerate(self.verse_ids):
+            if current == verse_id:
+                return self._text_at(index)
+        return default
+
+    def to_payload(self, first_verse=None, last_verse=None):
+        """JSON-ready ``[{"verse", "text"}]``, optionally limited to a verse range."""
+        payload = []
+        for index, verse_id in enumerate(self.verse_ids):
+            if first_verse is not None or last_verse is not None:
+                if not isinstance(verse_id, int):
+                    continue
+                if first_verse is not None and verse_id < first_verse:
+                    continue
+                if last_verse is not None and verse_id > last_verse:
+                    continue
+            payload.append({"verse": verse_id, "text": self._text_at(index)})
+        return payload
+
+
+class TopicEntry:
+    __slots__ = ("book", "chapter", "verses", "extra")
+
+    def __init__(self, book, chapter, verses, extra=None):
+        self.book = book
+        self.chapter = chapter
+        self.verses = verses
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data or {})
+        book = data.pop("book", "")
+        chapter = data.pop("chapter", None)
+        verses = data.pop("verses", "")
+        return cls(book, chapter, verses, data or None)
+
+    def to_payload(self):
+        payload = {"book": self.book, "chapter": self.chapter, "verses": self.verses}
+        if self.extra:
+            payload.update(self.extra)
+        return payload
+
+
+class TopicRecord:
+    __slots__ = ("id", "name", "entries")
+
+    def __init__(self, topic_id, name, entries):
+        self.id = topic_id
+        self.name = name
+        self.entries = entries
+
+    @classmethod
+    def from_dict(cls, topic_id, data):
+        entries = tuple(
+            TopicEntry.from_dict(entry)
+            for entry in (data or {}).get("entries", [])
+            if isinstance(entry, dict)
+        )
+        return cls(topic_id, (data or {}).get("name", ""), entries)
+
+    def to_payload(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "references": [entry.to_payload() for entry in self.entries],
+        }
+
+
+def _measure(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, result
+
+
+def _synthetic_chapters(chapter_count=1189, verses_per_chapter=26, verse_length=130):
+    # Roughly the shape of a full Bible: 1,189 chapters and ~31,000 verses.
+    for chapter in range(chapter_count):
+        yield [
+            (str(verse), (f"{chapter}:{verse} " + "x" * verse_length)[:verse_length])
+            for verse in range(1, verses_per_chapter + 1)
+        ]
+
+
+def _usfm_chapters(paths):
+    from usfm_parser import parse_usfm
+
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as fh:
+            parsed = parse_usfm(fh.read())
+        for chapter in parsed["chapters"].values():
+            yield [(verse_id, data.get("text", "")) for verse_id, data in chapter["verses"].items()]
+
+
+def main():
+    paths = sys.argv[1:]
+    chapters = list(_usfm_chapters(paths) if paths else _synthetic_chapters())
+    verse_count = sum(len(chapter) for chapter in chapters)
+
+    # Copy each text as Firestore decoding would, so both sides pay for it.
+    dict_bytes, _ = _measure(
+        lambda: [
+            [
+                {"verse": int(verse_id), "text": text.encode("utf-8").decode("utf-8")}
+                for verse_id, text in chapter
+            ]
+            for chapter in chapters
+        ]
+    )
+    compact_bytes, _ = _measure(lambda: [ChapterText.from_verses(chapter) for chapter in chapters])
+
+    print(f"{len(chapters)} chapters, {verse_count} verses")
+    print(f"  list of verse dicts: {dict_bytes / 1024 / 1024:8.2f} MiB")
+    print(f"  ChapterText records: {compact_bytes / 1024 / 1024:8.2f} MiB")
+    if compact_bytes:
+        print(f"  reduction:           {dict_bytes / compact_bytes:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
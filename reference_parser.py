@@ -0,0 +1,536 @@
+"""Shared Bible reference engine used by the Flask API and the importers.
+
+Book names are normalized through bounded caches, and passage specs such as
+"1:6-8,15", "3:16-4:2", "4:12-17a" or "٣:١٦–٤:٢" are parsed into tuples of
+:class:`VerseSpan`.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+ARABIC_INDIC_DIGIT_TRANSLATION = str.maketrans(
+    {
+        "٠": "0",
+        "١": "1",
+        "٢": "2",
+        "٣": "3",
+        "٤": "4",
+        "٥": "5",
+        "٦": "6",
+        "٧": "7",
+        "٨": "8",
+        "٩": "9",
+        "۰": "0",
+        "۱": "1",
+        "۲": "2",
+        "۳": "3",
+        "۴": "4",
+        "۵": "5",
+        "۶": "6",
+        "۷": "7",
+        "۸": "8",
+        "۹": "9",
+    }
+)
+
+
+# Dash and separator variants seen in CSV exports and Arabic keyboards.
+_REFERENCE_PUNCTUATION_TRANSLATION = str.maketrans(
+    {
+        "\u2010": "-",
+        "\u2011": "-",
+        "\u2012": "-",
+        "\u2013": "-",
+        "\u2014": "-",
+        "\u2015": "-",
+        "\u2212": "-",
+        "\ufe63": "-",
+        "\uff0d": "-",
+        "\uff1a": ":",
+        "\u060c": ",",
+        "\u061b": ";",
+    }
+)
+
+
+# Book names come from a small, fixed vocabulary (topic entries, frontend
+# menus, Firestore document ids), so a bounded cache keeps every lookup warm.
+BOOK_NAME_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=BOOK_NAME_CACHE_SIZE)
+def normalize_book_token(value: str) -> str:
+    normalized = (value or "").translate(ARABIC_INDIC_DIGIT_TRANSLATION)
+    return "".join(ch.lower() for ch in normalized if ch.isalnum())
+
+
+_ORDINAL_WORDS = {
+    "first": "1",
+    "second": "2",
+    "third": "3",
+    "fourth": "4",
+}
+
+
+_ROMAN_NUMERALS = {
+    "i": "1",
+    "ii": "2",
+    "iii": "3",
+    "iv": "4",
+    "v": "5",
+    "vi": "6",
+    "vii": "7",
+    "viii": "8",
+}
+
+
+_BOOK_SYNONYMS = {
+    "canticles": ["songofsongs", "songofsolomon"],
+    "songofsongs": ["songofsolomon", "canticles"],
+    "songofsolomon": ["songofsongs", "canticles"],
+    "psalm": ["psalms"],
+    "psalms": ["psalm"],
+    # Arabic gospel book names used by the frontend.
+    "متى": ["matthew", "mathew"],
+    "متّى": ["matthew", "mathew"],
+    "مرقس": ["mark"],
+    "لوقا": ["luke"],
+    "يوحنا": ["john"],
+    "يوحنّا": ["john"],
+    # Provide reverse lookups so English documents can match Arabic requests.
+    "matthew": ["متى", "متّى"],
+    "mathew": ["متى", "متّى"],
+    "mark": ["مرقس"],
+    "luke": ["لوقا"],
+    "john": ["يوحنا", "يوحنّا"],
+}
+
+
+def _register_book_synonyms(base_name, *variants):
+    base_token = normalize_book_token(base_name)
+    if not base_token:
+        return
+    base_synonyms = _BOOK_SYNONYMS.setdefault(base_token, [])
+    for variant in variants:
+        token = normalize_book_token(variant)
+        if not token or token == base_token:
+            continue
+        if token not in base_synonyms:
+            base_synonyms.append(token)
+        reciprocal = _BOOK_SYNONYMS.setdefault(token, [])
+        if base_token not in reciprocal:
+            reciprocal.append(base_token)
+
+
+_ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES = {
+    "Genesis": ["التكوين", "سفر التكوين"],
+    "Exodus": ["الخروج", "سفر الخروج"],
+    "Leviticus": ["اللاويين"],
+    "Numbers": ["العدد"],
+    "Deuteronomy": ["التثنية"],
+    "Joshua": ["يشوع"],
+    "Judges": ["القضاة"],
+    "Ruth": ["راعوث"],
+    "1 Samuel": [
+        "صموئيل الاول",
+        "صموئيل الأول",
+        "أول صموئيل",
+        "رسالة صموئيل الاول",
+        "١ صموئيل",
+        "1 صموئيل",
+    ],
+    "2 Samuel": [
+        "صموئيل الثاني",
+        "صموئيل الثاني",
+        "ثاني صموئيل",
+        "٢ صموئيل",
+        "2 صموئيل",
+    ],
+    "1 Kings": ["الملوك الاول", "الملوك الأول", "١ الملوك", "1 الملوك"],
+    "2 Kings": ["الملوك الثاني", "الملوك الثاني", "٢ الملوك", "2 الملوك"],
+    "1 Chronicles": [
+        "أخبار الأيام الأول",
+        "اخبار الايام الاول",
+        "١ أخبار الأيام",
+        "1 أخبار الأيام",
+    ],
+    "2 Chronicles": [
+        "أخبار الأيام الثاني",
+        "اخبار الايام الثاني",
+        "٢ أخبار الأيام",
+        "2 أخبار الأيام",
+    ],
+    "Ezra": ["عزرا"],
+    "Nehemiah": ["نحميا"],
+    "Esther": ["أستير", "استير"],
+    "Job": ["أيوب"],
+    "Psalms": ["المزامير", "مزامير"],
+    "Proverbs": ["الأمثال", "امثال"],
+    "Ecclesiastes": ["الجامعة"],
+    "Song of Solomon": ["نشيد الأنشاد", "نشيد الانشاد", "نشيد"],
+    "Isaiah": ["إشعياء", "اشعياء"],
+    "Jeremiah": ["إرميا", "ارميا"],
+    "Lamentations": ["مراثي إرميا", "مراثي ارميا", "المراثي"],
+    "Ezekiel": ["حزقيال"],
+    "Daniel": ["دانيال"],
+    "Hosea": ["هوشع"],
+    "Joel": ["يوئيل"],
+    "Amos": ["عاموس"],
+    "Obadiah": ["عوبديا"],
+    "Jonah": ["يونان"],
+    "Micah": ["ميخا"],
+    "Nahum": ["ناحوم"],
+    "Habakkuk": ["حبقوق"],
+    "Zephaniah": ["صفنيا"],
+    "Haggai": ["حجّي", "حجي"],
+    "Zechariah": ["زكريا"],
+    "Malachi": ["ملاخي"],
+    "Matthew": ["متى", "متّى"],
+    "Mark": ["مرقس"],
+    "Luke": ["لوقا"],
+    "John": ["يوحنا", "يوحنّا"],
+    "Acts": ["أعمال الرسل", "اعمال الرسل"],
+    "Romans": ["رومية", "رسالة رومية"],
+    "1 Corinthians": [
+        "كورنثوس الاولى",
+        "كورنثوس الأولى",
+        "١ كورنثوس",
+        "1 كورنثوس",
+        "رسالة كورنثوس الاولى",
+    ],
+    "2 Corinthians": [
+        "كورنثوس الثانية",
+        "كورنثوس الثانيه",
+        "٢ كورنثوس",
+        "2 كورنثوس",
+        "رسالة كورنثوس الثانية",
+    ],
+    "Galatians": ["غلاطية", "رسالة غلاطية"],
+    "Ephesians": ["أفسس", "افسس", "رسالة أفسس"],
+    "Philippians": ["فيلبي", "رسالة فيلبي"],
+    "Colossians": ["كولوسي", "رسالة كولوسي"],
+    "1 Thessalonians": [
+        "تسالونيكي الاولى",
+        "تسالونيكي الأولى",
+        "١ تسالونيكي",
+        "1 تسالونيكي",
+    ],
+    "2 Thessalonians": [
+        "تسالونيكي الثانية",
+        "تسالونيكي الثانيه",
+        "٢ تسالونيكي",
+        "2 تسالونيكي",
+    ],
+    "1 Timothy": [
+        "تيموثاوس الاولى",
+        "تيموثاوس الأولى",
+        "١ تيموثاوس",
+        "1 تيموثاوس",
+    ],
+    "2 Timothy": [
+        "تيموثاوس الثانية",
+        "تيموثاوس الثانيه",
+        "٢ تيموثاوس",
+        "2 تيموثاوس",
+    ],
+    "Titus": ["تيطس"],
+    "Philemon": ["فيلمون"],
+    "Hebrews": ["العبرانيين", "رسالة العبرانيين"],
+    "James": ["يعقوب", "رسالة يعقوب"],
+    "1 Peter": [
+        "بطرس الاولى",
+        "بطرس الأولى",
+        "١ بطرس",
+        "1 بطرس",
+    ],
+    "2 Peter": [
+        "بطرس الثانية",
+        "بطرس الثانيه",
+        "٢ بطرس",
+        "2 بطرس",
+    ],
+    "1 John": [
+        "يوحنا الاولى",
+        "يوحنا الأولى",
+        "١ يوحنا",
+        "1 يوحنا",
+        "رسالة يوحنا الاولى",
+    ],
+    "2 John": [
+        "يوحنا الثانية",
+        "يوحنا الثانيه",
+        "٢ يوحنا",
+        "2 يوحنا",
+        "رسالة يوحنا الثانية",
+    ],
+    "3 John": [
+        "يوحنا الثالثة",
+        "يوحنا الثالثه",
+        "٣ يوحنا",
+        "3 يوحنا",
+        "رسالة يوحنا الثالثة",
+    ],
+    "Jude": ["يهوذا", "رسالة يهوذا"],
+    "Revelation": ["رؤيا يوحنا", "سفر الرؤيا", "الرؤيا"],
+}
+
+
+for english_name, variants in _ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES.items():
+    _register_book_synonyms(english_name, *variants)
+
+
+ARABIC_BOOK_DOCUMENT_OVERRIDES = {}
+for english_name, variants in _ARABIC_BOOK_DOCUMENT_OVERRIDE_SOURCES.items():
+    doc_id = english_name
+    tokens = {normalize_book_token(english_name)}
+    tokens.update(normalize_book_token(variant) for variant in variants)
+    for token in tokens:
+        if token:
+            ARABIC_BOOK_DOCUMENT_OVERRIDES[token] = doc_id
+
+
+def _expand_with_synonyms(tokens):
+    expanded = set()
+    stack = list(tokens)
+    while stack:
+        token = stack.pop()
+        if not token or token in expanded:
+            continue
+        expanded.add(token)
+        for synonym in _BOOK_SYNONYMS.get(token, []):
+            stack.append(synonym)
+    return expanded
+
+
+@lru_cache(maxsize=BOOK_NAME_CACHE_SIZE)
+def book_name_candidates(name: str) -> frozenset:
+    if not name:
+        return frozenset()
+    tokens = set()
+    normalized = normalize_book_token(name)
+    tokens.add(normalized)
+    tokens.add(re.sub(r"^[0-9]+", "", normalized))
+
+    for word, digit in _ORDINAL_WORDS.items():
+        if normalized.startswith(word):
+            remainder = normalized[len(word) :]
+            tokens.add(digit + remainder)
+            tokens.add(remainder)
+
+    for roman, digit in _ROMAN_NUMERALS.items():
+        if normalized.startswith(roman):
+            remainder = normalized[len(roman) :]
+            tokens.add(digit + remainder)
+            tokens.add(remainder)
+
+    return frozenset(token for token in _expand_with_synonyms(tokens) if token)
+
+
+@lru_cache(maxsize=BOOK_NAME_CACHE_SIZE)
+def document_book_tokens(doc_id: str) -> frozenset:
+    parts = (doc_id or "").split(" ")
+    tokens = set()
+    tokens.add(normalize_book_token(doc_id))
+    if len(parts) > 1:
+        tokens.add(normalize_book_token(" ".join(parts[1:])))
+    tokens.add(normalize_book_token(parts[0]))
+    tokens.add(normalize_book_token(parts[-1]))
+    return frozenset(token for token in _expand_with_synonyms(tokens) if token)
+
+
+PASSAGE_CACHE_SIZE = 4096
+
+# Verses may carry a part suffix ("17a", "16b"), as synopsis tables use them.
+_PASSAGE_PIECE_PATTERN = re.compile(
+    r"(?:(\d+):)?(\d+)([a-d])?(?:-(?:(\d+):)?(\d+)([a-d])?)?", re.IGNORECASE
+)
+
+
+class VerseSpan(NamedTuple):
+    """
+    Inclusive span of verses; ``end_verse`` of ``None`` means "to chapter end".
+    ``start_part`` / ``end_part`` keep half-verse suffixes ("a", "b") for
+    display only: reads always cover the whole verse.
+    """
+
+    start_chapter: int
+    start_verse: int
+    end_chapter: int
+    end_verse: Optional[int]
+    start_part: Optional[str] = None
+    end_part: Optional[str] = None
+
+    @property
+    def is_single_chapter(self) -> bool:
+        return self.start_chapter == self.end_chapter and self.end_verse is not None
+
+    @property
+    def verse_count(self) -> int:
+        """Number of verses in a bounded single-chapter span."""
+        if not self.is_single_chapter:
+            raise ValueError("Only bounded single-chapter spans can be counted")
+        return self.end_verse - self.start_verse + 1
+
+    def verse_numbers(self):
+        if not self.is_single_chapter:
+            raise ValueError("Only bounded single-chapter spans can be enumerated")
+        return range(self.start_verse, self.end_verse + 1)
+
+
+def normalize_reference_text(value: str) -> str:
+    normalized = (value or "").translate(ARABIC_INDIC_DIGIT_TRANSLATION)
+    normalized = normalized.translate(_REFERENCE_PUNCTUATION_TRANSLATION)
+    return re.sub(r"\s+", "", normalized)
+
+
+def _parse_passage_piece(piece: str, current_chapter: Optional[int]) -> VerseSpan:
+    match = _PASSAGE_PIECE_PATTERN.fullmatch(piece)
+    if not match:
+        raise ValueError(f"Invalid reference {piece!r}")
+    start_chapter, start, start_part, end_chapter, end, end_part = match.groups()
+    start_chapter, start, end_chapter, end = (
+        int(group) if group is not None else None
+        for group in (start_chapter, start, end_chapter, end)
+    )
+    start_part = start_part.lower() if start_part else None
+    end_part = end_part.lower() if end_part else None
+
+    if start_chapter is None and current_chapter is None:
+        # Bare numbers without any chapter context name whole chapters ("5", "5-6").
+        if start_part or end_part:
+            raise ValueError(f"Invalid reference {piece!r}")
+        last_chapter = end if end is not None else start
+        if end_chapter is not None:
+            span = VerseSpan(start, 1, end_chapter, end)
+        else:
+            span = VerseSpan(start, 1, last_chapter, None)
+    else:
+        if start_chapter is None:
+            start_chapter = current_chapter
+        if end is None:
+            span = VerseSpan(start_chapter, start, start_chapter, start, start_part, start_part)
+        elif end_chapter is None:
+            span = VerseSpan(start_chapter, start, start_chapter, end, start_part, end_part)
+        else:
+            span = VerseSpan(start_chapter, start, end_chapter, end, start_part, end_part)
+
+    if span.start_chapter < 1 or span.start_verse < 1:
+        raise ValueError(f"Invalid reference {piece!r}")
+    end_key = (span.end_chapter, span.end_verse if span.end_verse is not None else float("inf"))
+    if end_key < (span.start_chapter, span.start_verse):
+        raise ValueError(f"Reference {piece!r} ends before it starts")
+    return span
+
+
+@lru_cache(maxsize=PASSAGE_CACHE_SIZE)
+def parse_passage(spec: str, chapter: Optional[int] = None, strict: bool = True):
+    """
+    Parses a passage spec into a tuple of :class:`VerseSpan`.
+
+    ``chapter`` is the context for pieces without an explicit chapter, and a
+    piece such as "3:16" sets the context for the pieces after it, so
+    "1:6-8;15-28" yields both ranges in chapter 1. With ``strict=False``
+    malformed pieces are logged and skipped instead of raising ``ValueError``.
+    """
+    text = normalize_reference_text(spec)
+    spans = []
+    current_chapter = chapter
+    for piece in re.split(r"[;,]", text):
+        if not piece:
+            continue
+        try:
+            span = _parse_passage_piece(piece, current_chapter)
+        except ValueError:
+            if strict:
+                raise
+            logger.warning("Skipping invalid reference %r in %r", piece, spec)
+            continue
+        spans.append(span)
+        if span.end_verse is not None:
+            current_chapter = span.end_chapter
+
+    if strict and not spans:
+        raise ValueError(f"Empty reference {spec!r}")
+    return tuple(spans)
+
+
+def format_span(span: VerseSpan, chapter: Optional[int] = None) -> str:
+    """Canonical text for ``span``; the chapter is omitted when it equals ``chapter``."""
+    if span.end_verse is None:
+        # Open spans only come from whole-chapter pieces such as "5" or "5-6".
+        if span.start_chapter == span.end_chapter:
+            return str(span.start_chapter)
+        return f"{span.start_chapter}-{span.end_chapter}"
+
+    start = f"{span.start_verse}{span.start_part or ''}"
+    if span.start_chapter != chapter:
+        start = f"{span.start_chapter}:{start}"
+    end = f"{span.end_verse}{span.end_part or ''}"
+    if span.end_chapter != span.start_chapter:
+        return f"{start}-{span.end_chapter}:{end}"
+    if (span.end_verse, span.end_part) != (span.start_verse, span.start_part):
+        return f"{start}-{end}"
+    return start
+
+
+def format_passage(spans) -> str:
+    return ";".join(format_span(span) for span in spans)
+
+
+def split_by_chapter(span: VerseSpan):
+    """
+    Yields ``(chapter, first_verse, last_verse)`` for every chapter ``span``
+    touches; ``last_verse`` is ``None`` when the span runs to the chapter end.
+    """
+    for chapter in range(span.start_chapter, span.end_chapter + 1):
+        first_verse = span.start_verse if chapter == span.start_chapter else 1
+        last_verse = span.end_verse if chapter == span.end_chapter else None
+        yield chapter, first_verse, last_verse
+
+
+def plan_chapter_reads(spans, max_chapters=None, max_verses=None):
+    """
+    Groups a passage into the minimal set of chapter-level reads.
+
+    Returns ``{chapter: verse_numbers}`` in passage order, where
+    ``verse_numbers`` is a sorted tuple of the verses to fetch, or ``None``
+    when at least one piece runs to the chapter end and the whole chapter
+    has to be read.
+
+    With ``max_chapters`` / ``max_verses`` set, raises ``ValueError`` as soon
+    as the plan would exceed them, sizing each piece arithmetically first so
+    a huge spec never gets expanded.
+    """
+    plan = {}
+    bounded_verses = 0
+    for span in spans:
+        for chapter, first_verse, last_verse in split_by_chapter(span):
+            if max_chapters is not None and chapter not in plan and len(plan) >= max_chapters:
+                raise ValueError("Passage too large")
+            verses = plan.setdefault(chapter, set())
+            if verses is None:
+                continue
+            if last_verse is None:
+                bounded_verses -= len(verses)
+                plan[chapter] = None
+                continue
+            if max_verses is not None:
+                if bounded_verses + (last_verse - first_verse + 1) > max_verses:
+                    # Only overlaps with verses already planned can keep it in bounds.
+                    new_verses = (last_verse - first_verse + 1) - sum(
+                        1 for verse in verses if first_verse <= verse <= last_verse
+                    )
+                    if bounded_verses + new_verses > max_verses:
+                        raise ValueError("Passage too large")
+            before = len(verses)
+            verses.update(range(first_verse, last_verse + 1))
+            bounded_verses += len(verses) - before
+    return {
+        chapter: tuple(sorted(verses)) if verses is not None else None
+        for chapter, verses in plan.items()
+    }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Offline full-text indexer and in-process searcher for Bible versions.
+
+The indexer walks either local USFM files (through
+``usfm_parser.parse_usfm_structure``, which keeps verses that share a line
+with a paragraph marker) or the ``bibles/<language>/<version>`` tree in
+Firestore and writes one compact index per version:
+
+    <out>/<language>/<version>.idx
+
+Each file is gzip-compressed: a single JSON header line (verse table, texts,
+lengths and a term dictionary) followed by the posting lists, stored as
+delta + varint encoded ``(verse, term frequency)`` pairs.
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+from reference_parser import ARABIC_INDIC_DIGIT_TRANSLATION
+
+INDEX_FORMAT = 1
+DEFAULT_INDEX_DIR = "search_indexes"
+SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
+
+# BM25 parameters.
+_K1 = 1.2
+_B = 0.75
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel.
+_ARABIC_STRIP_PATTERN = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+
+_ARABIC_LETTER_TRANSLATION = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ٲ": "ا",
+        "ٳ": "ا",
+    }
+)
+
+
+def normalize_search_text(text: str) -> str:
+    normalized = (text or "").translate(ARABIC_INDIC_DIGIT_TRANSLATION)
+    normalized = _ARABIC_STRIP_PATTERN.sub("", normalized)
+    normalized = normalized.translate(_ARABIC_LETTER_TRANSLATION)
+    return normalized.casefold()
+
+
+def tokenize(text: str):
+    return re.findall(r"\w+", normalize_search_text(text))
+
+
+def _encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_postings(data, offset: int, length: int):
+    """Yields ``(verse_index, term_frequency)`` pairs from an encoded posting list."""
+    position = offset
+    end = offset + length
+    verse_index = 0
+    values = []
+    while position < end:
+        value = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+        if len(values) == 2:
+            verse_index += values[0]
+            yield verse_index, values[1]
+            values = []
+
+
+def build_index(verses, language: str, version: str):
+    """
+    Builds an index from ``(book, chapter, verse, text)`` tuples.
+
+    Returns ``(header, postings)`` ready for :func:`write_index`.
+    """
+    references = []
+    texts = []
+    lengths = []
+    term_postings = defaultdict(list)
+
+    for verse_index, (book, chapter, verse, text) in enumerate(
+        sorted(verses, key=lambda item: (item[0], int(item[1]), int(item[2])))
+    ):
+        tokens = tokenize(text)
+        references.append([book, int(chapter), int(verse)])
+        texts.append(text)
+        lengths.append(len(tokens))
+        for term, frequency in Counter(tokens).items():
+            term_postings[term].append((verse_index, frequency))
+
+    postings = bytearray()
+    terms = {}
+    for term in sorted(term_postings):
+        offset = len(postings)
+        previous = 0
+        for verse_index, frequency in term_postings[term]:
+            _encode_varint(verse_index - previous, postings)
+            _encode_varint(frequency, postings)
+            previous = verse_index
+        terms[term] = [offset, len(postings) - offset, len(term_postings[term])]
+
+    header = {
+        "format": INDEX_FORMAT,
+        "language": language,
+        "version": version,
+        "verses": references,
+        "texts": texts,
+        "lengths": lengths,
+        "terms": terms,
+    }
+    return header, bytes(postings)
+
+
+def _path_component(value: str) -> str:
+    separators = {"/", "\\", os.sep, os.altsep, "\0"} - {None}
+    if not value or value in (".", "..") or any(sep in value for sep in separators):
+        raise ValueError(f"Invalid index name {value!r}")
+    return value
+
+
+def index_path(index_dir: str, language: str, version: str) -> str:
+    """Path of one version's index; raises ``ValueError`` for names that would leave ``index_dir``."""
+    return os.path.join(index_dir, _path_component(language), f"{_path_component(version)}.idx")
+
+
+def write_index(path: str, header: dict, postings: bytes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb") as fh:
+        fh.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        fh.write(b"\n")
+        fh.write(postings)
+    os.replace(tmp_path, path)
+
+
+class SearchIndex:
+    def __init__(self, header: dict, postings: bytes):
+        if header.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported search index format {header.get('format')!r}")
+        self.language = header["language"]
+        self.version = header["version"]
+        self._verses = header["verses"]
+        self._texts = header["texts"]
+        self._lengths = header["lengths"]
+        self._terms = header["terms"]
+        self._postings = postings
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with gzip.open(path, "rb") as fh:
+            raw = fh.read()
+        header_line, _, postings = raw.partition(b"\n")
+        return cls(json.loads(header_line.decode("utf-8")), postings)
+
+    def __len__(self):
+        return len(self._verses)
+
+    def search(self, query: str, limit: int = 20):
+        """
+        Ranks verses by BM25. Verses matching more of the query terms always
+        rank above verses matching fewer. Returns ``(total_hits, hits)``.
+        """
+        verse_count = len(self._verses)
+        scores = defaultdict(float)
+        matched_terms = Counter()
+
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if not entry:
+                continue
+            offset, length, document_frequency = entry
+            idf = math.log(1 + (verse_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for verse_index, frequency in _decode_postings(self._postings, offset, length):
+                length_ratio = self._lengths[verse_index] / self._average_length
+                scores[verse_index] += idf * (
+                    frequency * (_K1 + 1) / (frequency + _K1 * (1 - _B + _B * length_ratio))
+                )
+                matched_terms[verse_index] += 1
+
+        ranked = heapq.nlargest(
+            limit,
+            scores,
+            key=lambda verse_index: (matched_terms[verse_index], scores[verse_index], -verse_index),
+        )
+        hits = []
+        for verse_index in ranked:
+            book, chapter, verse = self._verses[verse_index]
+            hits.append(
+                {
+                    "book": book,
+                    "chapter": chapter,
+                    "verse": verse,
+                    "text": self._texts[verse_index],
+                    "score": round(scores[verse_index], 4),
+                }
+            )
+        return len(scores), hits
+
+
+def _usfm_verses(paths):
+    from usfm_parser import (
+        parse_usfm,
+        parse_usfm_structure,
+        resolve_book_name,
+        structure_verse_texts,
+    )
+
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as fh:
+            content = fh.read()
+        book = resolve_book_name(parse_usfm(content), path)
+        for chapter, segments in parse_usfm_structure(content).items():
+            if not chapter.isdigit():
+                continue
+            for verse, text in structure_verse_texts(segments).items():
+                if isinstance(verse, int) and text:
+                    yield book, chapter, verse, text
+
+
+def _firestore_client():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(SERVICE_ACCOUNT_FILE))
+    return firestore.client()
+
+
+def _firestore_verses(language: str, version: str):
+    from records import verse_text
+
+    db = _firestore_client()
+    books = db.collection("bibles").document(language).collection(version)
+    for book_doc in books.list_documents():
+        for chapter_doc in book_doc.collection("chapters").list_documents():
+            if not chapter_doc.id.isdigit():
+                continue
+            for verse_doc in chapter_doc.collection("verses").stream():
+                text = verse_text(verse_doc.to_dict())
+                if verse_doc.id.isdigit() and text:
+                    yield book_doc.id, chapter_doc.id, verse_doc.id, text
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build a full-text search index for one Bible version.")
+    ap.add_argument("--language", required=True, help="Language key as stored under bibles/ (e.g., arabic)")
+    ap.add_argument("--version", required=True, help="Version key (e.g., 'van dyck')")
+    ap.add_argument("--usfm", nargs="*", default=None, help="Index local USFM files instead of Firestore")
+    ap.add_argument("--out", default=DEFAULT_INDEX_DIR, help="Index directory served as SEARCH_INDEX_DIR")
+    args = ap.parse_args()
+
+    if args.usfm:
+        verses = list(_usfm_verses(args.usfm))
+    else:
+        verses = list(_firestore_verses(args.language, args.version))
+    if not verses:
+        raise SystemExit("No verses found to index")
+
+    header, postings = build_index(verses, args.language, args.version)
+    path = index_path(args.out, args.language, args.version)
+    write_index(path, header, postings)
+    size = os.path.getsize(path)
+    print(f"✔ Indexed {len(verses)} verses, {len(header['terms'])} terms → {path} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Coalesces concurrent identical calls so only one runs per key at a time."""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    ``do(key, fn, ...)`` runs ``fn`` once for every group of concurrent callers
+    sharing ``key``: the first caller (the leader) executes it and the others
+    wait and receive the same result or exception. Results are shared, so
+    callers must treat them as read-only.
+
+    ``lead``, if given, is called before a caller becomes the leader, outside
+    the lock; callers that join an in-flight call never run it. An exception
+    from ``lead`` reaches only that caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    def do(self, key, fn, *args, lead=None, **kwargs):
+        prepared = lead is None
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    self._coalesced += 1
+                    leader = False
+                    break
+                if prepared:
+                    call = _Call()
+                    self._calls[key] = call
+                    self._executed += 1
+                    leader = True
+                    break
+            lead()
+            prepared = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "errors": self._errors,
+                "in_flight": len(self._calls),
+            }
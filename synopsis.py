@@ -0,0 +1,89 @@
+"""Per-topic parallel passage alignment for the gospel synopsis."""
+
+from reference_parser import format_passage, normalize_book_token, parse_passage
+
+GOSPELS = ["Matthew", "Mark", "Luke", "John"]
+
+_GOSPEL_BY_TOKEN = {
+    normalize_book_token(alias): gospel
+    for gospel, aliases in {
+        "Matthew": ["Matthew", "Mathew", "متى", "متّى"],
+        "Mark": ["Mark", "مرقس"],
+        "Luke": ["Luke", "لوقا"],
+        "John": ["John", "يوحنا", "يوحنّا"],
+    }.items()
+    for alias in aliases
+}
+
+
+def canonical_gospel(book: str):
+    return _GOSPEL_BY_TOKEN.get(normalize_book_token(book))
+
+
+def build_alignment(name: str, entries) -> dict:
+    """
+    Turns topic ``entries`` ({book, chapter, verses}) into a synopsis document.
+
+    ``columns`` holds one item per participating gospel in canonical order,
+    each with its passages sorted by position and the chapters they touch.
+    The topic itself is the unit of parallelism: the source CSV row names
+    which passages correspond, not which passage of one gospel matches which
+    passage of another, so no finer pairing is claimed. ``mask`` has bit i
+    set when ``GOSPELS[i]`` participates, matching the frontend's presence
+    mask.
+    """
+    spans_by_gospel = {}
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        gospel = canonical_gospel(entry.get("book", ""))
+        try:
+            chapter = int(entry.get("chapter"))
+        except (TypeError, ValueError):
+            continue
+        if gospel is None:
+            continue
+        spans = parse_passage(str(entry.get("verses") or ""), chapter, strict=False)
+        spans_by_gospel.setdefault(gospel, []).extend(
+            span for span in spans if span.end_verse is not None
+        )
+
+    columns = []
+    for gospel in GOSPELS:
+        spans = sorted(set(spans_by_gospel.get(gospel, [])))
+        if not spans:
+            continue
+        chapters = sorted(
+            {
+                chapter
+                for span in spans
+                for chapter in range(span.start_chapter, span.end_chapter + 1)
+            }
+        )
+        columns.append(
+            {
+                "book": gospel,
+                "passages": [
+                    {
+                        "passage": format_passage([span]),
+                        "chapter": span.start_chapter,
+                        "verse": span.start_verse,
+                        "end_chapter": span.end_chapter,
+                        "end_verse": span.end_verse,
+                    }
+                    for span in spans
+                ],
+                "chapters": chapters,
+            }
+        )
+
+    mask = 0
+    for column in columns:
+        mask |= 1 << GOSPELS.index(column["book"])
+
+    return {
+        "name": name,
+        "gospels": [column["book"] for column in columns],
+        "mask": mask,
+        "columns": columns,
+    }
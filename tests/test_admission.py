@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AdmissionRejected, ConcurrencyGate, TokenBuckets, parse_route_limits
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_limits_with_retry_after(clock):
+    buckets = TokenBuckets(per_minute=60, burst=2)
+    buckets.take("1.2.3.4", "get_verse")
+    buckets.take("1.2.3.4", "get_verse")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        buckets.take("1.2.3.4", "get_verse")
+    assert rejected.value.status == 429
+    assert rejected.value.retry_after == 1
+    assert buckets.stats() == {"allowed": 2, "limited": 1, "tracked": 1}
+
+
+def test_bucket_refills_over_time(clock):
+    buckets = TokenBuckets(per_minute=6, burst=1)
+    buckets.take("c", "r")
+
+    clock.now += 4
+    with pytest.raises(AdmissionRejected) as rejected:
+        buckets.take("c", "r")
+    # 0.4 of a token after 4s at 6/min; the remaining 0.6 takes 6s.
+    assert rejected.value.retry_after == 6
+
+    clock.now += 6.5
+    buckets.take("c", "r")
+
+
+def test_buckets_are_per_client_and_route(clock):
+    buckets = TokenBuckets(per_minute=60, burst=1)
+    buckets.take("a", "get_verse")
+    buckets.take("b", "get_verse")
+    buckets.take("a", "get_chapter")
+    with pytest.raises(AdmissionRejected):
+        buckets.take("a", "get_verse")
+
+
+def test_route_overrides_and_disabled_routes(clock):
+    buckets = TokenBuckets(
+        per_minute=60, burst=1, route_limits=parse_route_limits("search=0,get_verse=60:3", 1)
+    )
+    for _ in range(10):
+        buckets.take("a", "search")
+    for _ in range(3):
+        buckets.take("a", "get_verse")
+    with pytest.raises(AdmissionRejected):
+        buckets.take("a", "get_verse")
+
+
+def test_least_recently_used_buckets_are_dropped(clock):
+    buckets = TokenBuckets(per_minute=60, burst=1, max_clients=2)
+    buckets.take("a", "r")
+    buckets.take("b", "r")
+    buckets.take("c", "r")
+    assert buckets.stats()["tracked"] == 2
+    buckets.take("a", "r")  # evicted, so it starts with a full bucket again
+
+
+def test_parse_route_limits():
+    assert parse_route_limits("get_verse=600:120, search=60,bad,x=y,=5", 30) == {
+        "get_verse": (600.0, 120),
+        "search": (60.0, 30),
+    }
+
+
+def test_gate_sheds_when_queue_is_full():
+    gate = ConcurrencyGate(max_active=1, max_queued=0, queue_timeout=5)
+    gate.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        gate.acquire()
+    assert rejected.value.status == 503
+    assert gate.stats()["shed"] == 1
+    gate.release()
+    gate.acquire()
+    gate.release()
+    assert gate.stats()["active"] == 0
+
+
+def test_gate_times_out_queued_requests():
+    gate = ConcurrencyGate(max_active=1, max_queued=1, queue_timeout=0.05)
+    gate.acquire()
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected) as rejected:
+        gate.acquire()
+    assert rejected.value.status == 503
+    assert time.monotonic() - started >= 0.05
+    stats = gate.stats()
+    assert stats["timed_out"] == 1
+    assert stats["queued"] == 0
+    gate.release()
+
+
+def test_gate_admits_queued_request_when_a_slot_frees():
+    gate = ConcurrencyGate(max_active=1, max_queued=1, queue_timeout=5)
+    gate.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        gate.acquire()
+        admitted.set()
+        gate.release()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    for _ in range(1000):
+        if gate.stats()["queued"] == 1:
+            break
+        time.sleep(0.001)
+    gate.release()
+    thread.join(5)
+
+    assert admitted.is_set()
+    stats = gate.stats()
+    assert stats["waited"] == 1
+    assert stats["admitted"] == 2
+    assert stats["active"] == 0
+
+
+def test_disabled_gate_admits_everything():
+    gate = ConcurrencyGate(max_active=0, max_queued=0, queue_timeout=0)
+    for _ in range(5):
+        gate.acquire()
+    gate.release()
+    assert gate.stats()["admitted"] == 0
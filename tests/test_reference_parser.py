@@ -0,0 +1,114 @@
+import pytest
+
+from reference_parser import (
+    VerseSpan,
+    book_name_candidates,
+    format_passage,
+    format_span,
+    normalize_book_token,
+    parse_passage,
+    plan_chapter_reads,
+    split_by_chapter,
+)
+
+
+def test_bare_number_without_context_is_a_whole_chapter():
+    assert parse_passage("5") == (VerseSpan(5, 1, 5, None),)
+    assert parse_passage("5-6") == (VerseSpan(5, 1, 6, None),)
+
+
+def test_bare_number_with_context_is_a_verse():
+    assert parse_passage("5", 3) == (VerseSpan(3, 5, 3, 5),)
+
+
+def test_chapter_carries_across_separators():
+    assert parse_passage("1:6-8;15-28") == (
+        VerseSpan(1, 6, 1, 8),
+        VerseSpan(1, 15, 1, 28),
+    )
+    assert parse_passage("3:16,4:1-2,5") == (
+        VerseSpan(3, 16, 3, 16),
+        VerseSpan(4, 1, 4, 2),
+        VerseSpan(4, 5, 4, 5),
+    )
+
+
+def test_whole_chapter_piece_does_not_set_context():
+    assert parse_passage("5;7") == (VerseSpan(5, 1, 5, None), VerseSpan(7, 1, 7, None))
+
+
+def test_cross_chapter_span():
+    (span,) = parse_passage("3:16-4:2")
+    assert span == VerseSpan(3, 16, 4, 2)
+    assert not span.is_single_chapter
+    assert list(split_by_chapter(span)) == [(3, 16, None), (4, 1, 2)]
+
+
+def test_arabic_digits_and_punctuation():
+    assert parse_passage("٣:١٦–٤:٢") == (VerseSpan(3, 16, 4, 2),)
+    assert parse_passage("١:٦-٨؛١٥") == (VerseSpan(1, 6, 1, 8), VerseSpan(1, 15, 1, 15))
+
+
+def test_half_verse_suffixes_round_trip():
+    assert format_passage(parse_passage("4:12-17a")) == "4:12-17a"
+    assert format_passage(parse_passage("3:16b-4:2")) == "3:16b-4:2"
+    assert format_passage(parse_passage("6:3A")) == "6:3a"
+    assert parse_passage("6:3a")[0].verse_numbers() == range(3, 4)
+
+
+@pytest.mark.parametrize("spec", ["", "x", "5a", "3:0", "0:1", "3:8-2", "4:1-3:9"])
+def test_strict_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_passage(spec)
+
+
+def test_non_strict_skips_invalid_pieces():
+    assert parse_passage("x:1;2:5", strict=False) == (VerseSpan(2, 5, 2, 5),)
+    assert parse_passage("", strict=False) == ()
+
+
+def test_format_span_omits_context_chapter():
+    assert format_span(VerseSpan(3, 16, 3, 18), 3) == "16-18"
+    assert format_span(VerseSpan(3, 16, 3, 18)) == "3:16-18"
+    assert format_span(VerseSpan(3, 16, 3, 16)) == "3:16"
+    assert format_span(VerseSpan(3, 16, 4, 2), 3) == "16-4:2"
+    assert format_span(VerseSpan(5, 1, 6, None)) == "5-6"
+
+
+def test_verse_count_is_arithmetic():
+    (span,) = parse_passage("1:1-99999999")
+    assert span.verse_count == 99999999
+    with pytest.raises(ValueError):
+        VerseSpan(1, 1, 2, 3).verse_count
+
+
+def test_plan_merges_pieces_per_chapter():
+    plan = plan_chapter_reads(parse_passage("1:6-8;7-9;2:1"))
+    assert plan == {1: (6, 7, 8, 9), 2: (1,)}
+
+
+def test_plan_reads_whole_chapter_when_a_piece_runs_to_its_end():
+    plan = plan_chapter_reads(parse_passage("3:16-4:2;3:1-2"))
+    assert plan == {3: None, 4: (1, 2)}
+
+
+def test_plan_enforces_limits_before_expanding():
+    with pytest.raises(ValueError):
+        plan_chapter_reads(parse_passage("1:1-99999999"), max_verses=500)
+    with pytest.raises(ValueError):
+        plan_chapter_reads(parse_passage("1-99999999"), max_chapters=30)
+    with pytest.raises(ValueError):
+        plan_chapter_reads(parse_passage("1:1-1:99999999"), max_chapters=30, max_verses=500)
+
+
+def test_plan_limits_count_distinct_verses():
+    plan = plan_chapter_reads(parse_passage("1:1-400;1:1-400"), max_verses=500)
+    assert len(plan[1]) == 400
+    assert len(plan_chapter_reads(parse_passage("1-30"), max_chapters=30)) == 30
+    with pytest.raises(ValueError):
+        plan_chapter_reads(parse_passage("1:1-300;2:1-201"), max_verses=500)
+
+
+def test_book_name_candidates():
+    assert normalize_book_token("1 John") in book_name_candidates("1 John")
+    assert book_name_candidates("") == frozenset()
@@ -0,0 +1,95 @@
+import pytest
+
+from search_index import (
+    SearchIndex,
+    _decode_postings,
+    _encode_varint,
+    build_index,
+    index_path,
+    normalize_search_text,
+    tokenize,
+    write_index,
+)
+
+
+@pytest.mark.parametrize(
+    "pairs",
+    [[(0, 1)], [(3, 2), (130, 1), (20000, 300)], [(0, 127), (128, 128), (1 << 21, 1 << 14)]],
+)
+def test_varint_postings_round_trip(pairs):
+    data = bytearray(b"prefix")
+    offset = len(data)
+    previous = 0
+    for verse_index, frequency in pairs:
+        _encode_varint(verse_index - previous, data)
+        _encode_varint(frequency, data)
+        previous = verse_index
+    assert list(_decode_postings(bytes(data), offset, len(data) - offset)) == pairs
+
+
+def test_varint_uses_one_byte_below_128():
+    out = bytearray()
+    _encode_varint(127, out)
+    assert out == bytearray([0x7F])
+    _encode_varint(128, out)
+    assert out[1:] == bytearray([0x80, 0x01])
+
+
+def test_arabic_normalization():
+    assert normalize_search_text("إِبْرَاهِيمُ") == normalize_search_text("ابراهيم")
+    assert normalize_search_text("أحمد") == "احمد"
+    assert normalize_search_text("الـــله") == "الله"
+    assert normalize_search_text("٣ Word") == "3 word"
+    assert tokenize("قَالَ يَسُوعُ: «الحقّ»") == ["قال", "يسوع", "الحق"]
+
+
+def _index():
+    verses = [
+        ("John", 1, 1, "In the beginning was the Word"),
+        ("John", 1, 2, "The same was in the beginning with God"),
+        ("John", 3, 16, "For God so loved the world"),
+        ("Mark", 1, 3, "The voice of one crying in the wilderness"),
+        ("Mark", 1, 4, "God God God"),
+    ]
+    header, postings = build_index(verses, "english", "test")
+    return SearchIndex(header, postings)
+
+
+def test_more_matched_terms_rank_first():
+    total, hits = _index().search("God loved")
+    assert total == 3
+    # Matching both terms beats any number of repetitions of one term.
+    assert (hits[0]["book"], hits[0]["chapter"], hits[0]["verse"]) == ("John", 3, 16)
+    assert (hits[1]["book"], hits[1]["verse"]) == ("Mark", 4)
+
+
+def test_term_frequency_raises_score():
+    _, hits = _index().search("god")
+    assert hits[0]["verse"] == 4
+    assert hits[0]["score"] > hits[1]["score"]
+
+
+def test_search_limit_and_misses():
+    index = _index()
+    assert index.search("beginning", limit=1)[0] == 2
+    assert len(index.search("beginning", limit=1)[1]) == 1
+    assert index.search("absent") == (0, [])
+
+
+def test_write_and_load(tmp_path):
+    header, postings = build_index(
+        [("Mark", 1, 3, "The voice of one crying")], "english", "test"
+    )
+    path = index_path(str(tmp_path), "english", "test")
+    write_index(path, header, postings)
+    loaded = SearchIndex.load(path)
+    assert len(loaded) == 1
+    assert loaded.search("voice")[1][0]["verse"] == 3
+
+
+@pytest.mark.parametrize(
+    "language, version", [("..", "kjv"), ("english", "/tmp/x"), ("a/b", "kjv"), ("english", "")]
+)
+def test_index_path_rejects_escaping_names(language, version):
+    with pytest.raises(ValueError):
+        index_path("search_indexes", language, version)
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results = [None] * callers
+    threads = [
+        threading.Thread(target=lambda index=index: results.__setitem__(index, _call(flight, key, fn)))
+        for index in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _call(flight, key, fn):
+    try:
+        return ("ok", flight.do(key, fn))
+    except Exception as exc:
+        return ("error", exc)
+
+
+def _wait_for_waiters(flight, waiters):
+    for _ in range(1000):
+        if flight.stats()["coalesced"] >= waiters:
+            return
+        time.sleep(0.001)
+    raise AssertionError("callers never joined the flight")
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    threads, results = _run_concurrently(flight, "k", fetch, 5)
+    _wait_for_waiters(flight, 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert {id(result[1]) for result in results} == {id(results[0][1])}
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "errors": 0, "in_flight": 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = RuntimeError("boom")
+
+    def fetch():
+        release.wait(5)
+        raise error
+
+    threads, results = _run_concurrently(flight, "k", fetch, 3)
+    _wait_for_waiters(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [("error", error)] * 3
+    assert flight.stats()["errors"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_key_is_released_after_a_failure():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: "fresh") == "fresh"
+    assert flight.stats()["executed"] == 2
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_lead_runs_only_for_the_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    leads = []
+
+    def fetch():
+        release.wait(5)
+        return "value"
+
+    def call():
+        return flight.do("k", fetch, lead=lambda: leads.append(1))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    _wait_for_waiters(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert leads == [1]
+    assert flight.stats()["executed"] == 1
+
+
+def test_lead_failure_reaches_only_that_caller():
+    flight = SingleFlight()
+
+    def refuse():
+        raise PermissionError("shed")
+
+    with pytest.raises(PermissionError):
+        flight.do("k", lambda: "value", lead=refuse)
+    assert flight.stats() == {"executed": 0, "coalesced": 0, "errors": 0, "in_flight": 0}
+    assert flight.do("k", lambda: "value") == "value"
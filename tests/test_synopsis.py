@@ -0,0 +1,61 @@
+from synopsis import GOSPELS, build_alignment, canonical_gospel
+
+
+def test_canonical_gospel_names():
+    assert canonical_gospel("Mathew") == "Matthew"
+    assert canonical_gospel("مرقس") == "Mark"
+    assert canonical_gospel("يوحنّا") == "John"
+    assert canonical_gospel("Acts") is None
+
+
+def test_columns_follow_canonical_order_and_sort_passages():
+    alignment = build_alignment(
+        "Baptism",
+        [
+            {"book": "Luke", "chapter": 3, "verses": "21-22"},
+            {"book": "Matthew", "chapter": 3, "verses": "16-17"},
+            {"book": "Matthew", "chapter": 3, "verses": "13-15"},
+            {"book": "Mark", "chapter": 1, "verses": "9-11"},
+        ],
+    )
+    assert alignment["name"] == "Baptism"
+    assert alignment["gospels"] == ["Matthew", "Mark", "Luke"]
+    assert alignment["mask"] == 0b0111
+    matthew = alignment["columns"][0]
+    assert [passage["passage"] for passage in matthew["passages"]] == ["3:13-15", "3:16-17"]
+    assert matthew["chapters"] == [3]
+    assert "rows" not in alignment
+
+
+def test_passage_fields_for_cross_chapter_and_half_verses():
+    alignment = build_alignment("t", [{"book": "John", "chapter": 3, "verses": "16b-4:2"}])
+    (column,) = alignment["columns"]
+    assert alignment["mask"] == 1 << GOSPELS.index("John")
+    assert column["chapters"] == [3, 4]
+    assert column["passages"] == [
+        {"passage": "3:16b-4:2", "chapter": 3, "verse": 16, "end_chapter": 4, "end_verse": 2}
+    ]
+
+
+def test_duplicates_and_unusable_entries_are_dropped():
+    alignment = build_alignment(
+        "t",
+        [
+            {"book": "Mark", "chapter": 1, "verses": "1-3"},
+            {"book": "Mark", "chapter": "1", "verses": "1-3"},
+            {"book": "Mark", "chapter": "x", "verses": "4"},
+            {"book": "Acts", "chapter": 1, "verses": "1"},
+            "not an entry",
+        ],
+    )
+    (column,) = alignment["columns"]
+    assert [passage["passage"] for passage in column["passages"]] == ["1:1-3"]
+
+
+def test_empty_topic():
+    assert build_alignment("t", []) == {
+        "name": "t",
+        "gospels": [],
+        "mask": 0,
+        "columns": [],
+    }
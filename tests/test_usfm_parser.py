@@ -0,0 +1,83 @@
+import pytest
+
+# The uploader imports its Firebase/Storage dependencies at module level.
+pytest.importorskip("firebase_admin")
+pytest.importorskip("google.cloud.storage")
+pytest.importorskip("tqdm")
+
+from usfm_parser import (  # noqa: E402
+    chapter_verse_texts,
+    parse_usfm,
+    parse_usfm_structure,
+    strip_character_markup,
+    structure_verse_texts,
+)
+
+SAMPLE = "\n".join(
+    [
+        r"\id MRK",
+        r"\c 1",
+        r"\s1 The Preaching of John",
+        r"\p \v 1 The beginning of the gospel.",
+        r"\v 2 As it is written",
+        r"\q1 \v 3 The voice of one crying",
+        r"\q2 in the wilderness.",
+        r"\b",
+        r"\m \v 4 John came \qt baptizing\qt* in the wilderness\f + \ft note\f*.",
+        r"\c 2",
+        r"\p \v 1 And again",
+    ]
+)
+
+
+def test_markers_sharing_a_line_keep_their_verses():
+    structure = parse_usfm_structure(SAMPLE)
+    assert list(structure) == ["1", "2"]
+    assert structure["1"] == [
+        {"type": "heading", "marker": "s1", "text": "The Preaching of John"},
+        {
+            "type": "paragraph",
+            "marker": "p",
+            "content": [
+                {"verse": 1, "text": "The beginning of the gospel."},
+                {"verse": 2, "text": "As it is written"},
+            ],
+        },
+        {"type": "poetry", "marker": "q1", "content": [{"verse": 3, "text": "The voice of one crying"}]},
+        {"type": "poetry", "marker": "q2", "content": [{"verse": 3, "text": "in the wilderness."}]},
+        {"type": "break"},
+        {
+            "type": "paragraph",
+            "marker": "m",
+            "content": [{"verse": 4, "text": "John came baptizing in the wilderness."}],
+        },
+    ]
+
+
+def test_character_markers_do_not_start_poetry():
+    structure = parse_usfm_structure("\\c 1\n\\q1 \\v 1 Blessed \\qs Selah\\qs*\n")
+    assert [segment["marker"] for segment in structure["1"]] == ["q1"]
+
+
+def test_structure_verse_texts_join_continuation_lines():
+    texts = structure_verse_texts(parse_usfm_structure(SAMPLE)["1"])
+    assert texts == {
+        1: "The beginning of the gospel.",
+        2: "As it is written",
+        3: "The voice of one crying in the wilderness.",
+        4: "John came baptizing in the wilderness.",
+    }
+
+
+def test_chapter_verse_texts_cover_verses_parse_usfm_drops():
+    parsed = parse_usfm(SAMPLE)
+    structure = parse_usfm_structure(SAMPLE)
+    assert set(parsed["chapters"]["1"]["verses"]) == {"2"}
+    texts = chapter_verse_texts(parsed["chapters"]["1"], structure["1"])
+    assert list(texts) == ["1", "2", "3", "4"]
+    assert texts["3"] == "The voice of one crying in the wilderness."
+
+
+def test_strip_character_markup():
+    text = r'\w grace|strong="G5485"\w* of the \nd LORD\nd*' "'s word" r"\f + \ft note\f*."
+    assert strip_character_markup(text) == "grace of the LORD's word."
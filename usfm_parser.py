@@ -5,6 +5,9 @@ from google.cloud import storage
 from tqdm import tqdm
 import os
 
+from dataset_generation import bump_bible_generation
+from records import verse_text
+
 USFM_BOOK_NAMES = {
     "JHN": "John",
     "LUK": "Luke",
@@ -57,77 +60,274 @@ def parse_usfm(usfm_content):
     }
     return result
 
+# Render-ready chapter structure ------------------------------------------
+
+_NOTE_PATTERN = re.compile(r'\\(f|fe|x)\s.*?\\\1\*')
+_ATTRIBUTE_PATTERN = re.compile(r'\|[^\\]*')
+_MARKER_PATTERN = re.compile(r'\\(\+?[a-z]+\d*)(\*?)\s?')
+
+_HEADING_MARKER = re.compile(r'(s|ms|mr|r|d|sp)\d*$')
+# Paragraph-level poetry only; \qt and \qs are character markers inside a verse.
+_POETRY_MARKER = re.compile(r'(q[1-4]?|qr|qc|qa|qm[1-4]?|qd)$')
+_PARAGRAPH_MARKER = re.compile(r'(p|m|pi|nb|pc|pm|pmo|pmc|pmr|mi|li|cls)\d*$')
+_IGNORED_LINE_MARKER = re.compile(r'(id|ide|h|toc|toca|mt|mte|imt|is|ip|c|cl|cp|ca|rem|sts|usfm)\d*$')
+
+
+def strip_character_markup(text):
+    """Drops footnotes/cross references and inline character markers."""
+    stripped = _NOTE_PATTERN.sub('', text or '')
+    stripped = _ATTRIBUTE_PATTERN.sub('', stripped)
+    # Closing markers hug the following punctuation ("LORD\nd*'s").
+    stripped = re.sub(r'\\\+?[a-z]+\d*\*', '', stripped)
+    stripped = re.sub(r'\\\+?[a-z]+\d*\s?', ' ', stripped)
+    return re.sub(r'\s+', ' ', stripped).strip()
+
+
+def parse_usfm_structure(usfm_content):
+    """
+    Returns { chapter: [segment, ...] } with headings, paragraphs and poetry
+    in reading order, ready for rendering:
+
+        {"type": "heading", "marker": "s1", "text": "..."}
+        {"type": "paragraph" | "poetry", "marker": "p" | "q1" | ...,
+         "content": [{"verse": 16, "text": "..."}, ...]}
+        {"type": "break"}
+
+    Every run of text carries the verse it belongs to, so a verse that spans
+    several paragraphs or poetry lines appears in several segments. Unlike
+    parse_usfm this handles markers sharing a line ("\\p \\v 1 ...").
+    """
+    structure = {}
+    segments = None
+    current = None
+    verse = None
+
+    def close_current():
+        nonlocal current
+        if current is not None and current['content']:
+            segments.append(current)
+        current = None
+
+    def add_text(text):
+        nonlocal current
+        text = strip_character_markup(text)
+        if not text or segments is None:
+            return
+        if current is None:
+            current = {'type': 'paragraph', 'marker': 'p', 'content': []}
+        content = current['content']
+        if content and content[-1]['verse'] == verse:
+            content[-1]['text'] = f"{content[-1]['text']} {text}"
+        else:
+            content.append({'verse': verse, 'text': text})
+
+    for line in usfm_content.splitlines():
+        line = _ATTRIBUTE_PATTERN.sub('', _NOTE_PATTERN.sub('', line.strip()))
+        if line.startswith('\\c '):
+            close_current()
+            chapter = line.split()[1]
+            segments = structure.setdefault(chapter, [])
+            verse = None
+            continue
+
+        matches = [m for m in _MARKER_PATTERN.finditer(line) if not m.group(2)]
+        if not matches:
+            add_text(line)
+            continue
+        add_text(line[:matches[0].start()])
+
+        for index, match in enumerate(matches):
+            marker = match.group(1).lstrip('+')
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(line)
+            text = line[match.end():end]
+
+            if _IGNORED_LINE_MARKER.match(marker):
+                break
+            if _HEADING_MARKER.match(marker):
+                close_current()
+                heading = strip_character_markup(line[match.end():])
+                if heading and segments is not None:
+                    segments.append({'type': 'heading', 'marker': marker, 'text': heading})
+                break
+            if marker == 'b':
+                close_current()
+                if segments is not None:
+                    segments.append({'type': 'break'})
+            elif _POETRY_MARKER.match(marker):
+                close_current()
+                current = {'type': 'poetry', 'marker': marker, 'content': []}
+            elif _PARAGRAPH_MARKER.match(marker):
+                close_current()
+                current = {'type': 'paragraph', 'marker': marker, 'content': []}
+            elif marker == 'v':
+                number, _, text = text.partition(' ')
+                verse = int(number) if number.isdigit() else number
+            add_text(text)
+
+    close_current()
+    return structure
+
+
+def structure_verse_texts(segments):
+    """Joins the runs of one chapter's segments back into { verse: text }."""
+    texts = {}
+    for segment in segments:
+        for run in segment.get('content', []):
+            verse = run['verse']
+            if verse is None:
+                continue
+            texts[verse] = f"{texts[verse]} {run['text']}" if verse in texts else run['text']
+    return texts
+
+# Firestore rejects documents over 1 MiB; keep headroom for index overhead.
+MAX_CHAPTER_DOCUMENT_BYTES = 900 * 1024
+
+
+def _estimated_document_size(value):
+    # Firestore storage sizes: strings are UTF-8 bytes + 1, numbers 8 bytes,
+    # maps and arrays the sum of their parts (plus field names for maps).
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, dict):
+        return sum(len(key.encode('utf-8')) + 1 + _estimated_document_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimated_document_size(item) for item in value)
+    return 8
+
+
+def _verse_order(verse_id):
+    return (0, int(verse_id), '') if verse_id.isdigit() else (1, 0, verse_id)
+
+
+def chapter_verse_texts(chapter_data, structure):
+    """
+    { verse id: text } for one chapter, in verse order. Text comes from the
+    chapter's structure segments, which keep verses sharing a line with a
+    paragraph or poetry marker and their continuation lines; parse_usfm only
+    fills in verses the structure has no text for.
+    """
+    texts = {str(verse): text for verse, text in structure_verse_texts(structure).items() if text}
+    for verse_num, verse_data in (chapter_data or {}).get('verses', {}).items():
+        if not texts.get(str(verse_num)):
+            text = verse_text(verse_data)
+            if text:
+                texts[str(verse_num)] = text
+    return {verse_id: texts[verse_id] for verse_id in sorted(texts, key=_verse_order)}
+
+
+def build_chapter_document(chapter_num, verses, structure):
+    """
+    Chapter-level document: the render structure plus every verse (from
+    chapter_verse_texts) denormalized into parallel verse_ids/verse_texts
+    arrays, so the API can serve a chapter or a verse range with one read.
+    Parts that would push the document past Firestore's size limit are left
+    out; the per-verse documents remain.
+    """
+    document = {
+        'structure': structure,
+        'verse_ids': list(verses),
+        'verse_texts': list(verses.values()),
+    }
+    for field in ('verse_texts', 'structure'):
+        if _estimated_document_size(document) <= MAX_CHAPTER_DOCUMENT_BYTES:
+            break
+        print(f"⚠ Chapter {chapter_num} is too large to denormalize; dropping {field}")
+        document.pop(field)
+        if field == 'verse_texts':
+            document.pop('verse_ids')
+    return document
+
+
+def resolve_book_name(parsed, usfm_path):
+    # Book ID: try from \id line, then fall back to filename
+    raw_id = parsed.get('book_id')
+    if raw_id:
+        # Example: "\id JHN" or "\id JHN John"
+        book_id = raw_id.strip().split()[0]
+    else:
+        # No \id found in the USFM → try to infer from file name
+        base_name = os.path.basename(usfm_path)
+        book_id = None
+        for code in USFM_BOOK_NAMES.keys():
+            if code.lower() in base_name.lower():
+                book_id = code
+                break
+
+        if not book_id:
+            raise ValueError(
+                "Could not determine book_id: no \\id line in USFM and "
+                "filename does not contain a known book code."
+            )
+
+    return USFM_BOOK_NAMES.get(book_id, book_id)
+
 SERVICE_ACCOUNT_FILE = 'serviceAccountKey.json'
 BUCKET_NAME = 'synopsis-224b0.firebasestorage.app'
 USFM_FILE_PATH = 'arabic/New Arabic Version/Ar-MRK-nav.usfm'
 
-cred = credentials.Certificate(SERVICE_ACCOUNT_FILE)
-firebase_admin.initialize_app(cred, {
-    'storageBucket': BUCKET_NAME
-})
-db = firestore.client()
+def main():
+    cred = credentials.Certificate(SERVICE_ACCOUNT_FILE)
+    firebase_admin.initialize_app(cred, {
+        'storageBucket': BUCKET_NAME
+    })
+    db = firestore.client()
 
 
-client = storage.Client.from_service_account_json(SERVICE_ACCOUNT_FILE)
-bucket = client.bucket(BUCKET_NAME)
-blob = bucket.blob(USFM_FILE_PATH)
-usfm_content = blob.download_as_text(encoding='utf-8')
+    client = storage.Client.from_service_account_json(SERVICE_ACCOUNT_FILE)
+    bucket = client.bucket(BUCKET_NAME)
+    blob = bucket.blob(USFM_FILE_PATH)
+    usfm_content = blob.download_as_text(encoding='utf-8')
 
 
 
-parsed = parse_usfm(usfm_content)
+    parsed = parse_usfm(usfm_content)
+    structures = parse_usfm_structure(usfm_content)
 
-# --- figure out identifiers safely ---
+    # --- figure out identifiers safely ---
 
-# 1) Language and version (hardcode for now)
-language = "arabic"
-version = "New Arabic Version"
+    # Language and version (hardcode for now)
+    language = "arabic"
+    version = "New Arabic Version"
 
-# 2) Book ID: try from \id line, then fall back to filename
-raw_id = parsed.get('book_id')
-if raw_id:
-    # Example: "\id JHN" or "\id JHN John"
-    book_id = raw_id.strip().split()[0]
-else:
-    # No \id found in the USFM → try to infer from file name
-    base_name = os.path.basename(USFM_FILE_PATH)
-    book_id = None
-    for code in USFM_BOOK_NAMES.keys():
-        if code.lower() in base_name.lower():
-            book_id = code
-            break
+    book_name = resolve_book_name(parsed, USFM_FILE_PATH)
 
-    if not book_id:
-        raise ValueError(
-            "Could not determine book_id: no \\id line in USFM and "
-            "filename does not contain a known book code."
-        )
+    # Verse text for every read path comes from the structure parser
+    chapters = {
+        chapter_num: chapter_verse_texts(parsed['chapters'].get(chapter_num), structures.get(chapter_num, []))
+        for chapter_num in dict.fromkeys([*parsed['chapters'], *structures])
+    }
 
-book_name = USFM_BOOK_NAMES.get(book_id, book_id)
+    # Get total verses for progress bar (optional)
+    total_verses = sum(len(verses) for verses in chapters.values())
+    progress = tqdm(total=total_verses, desc="Uploading verses")
 
-# Get total verses for progress bar (optional)
-total_verses = sum(len(ch['verses']) for ch in parsed['chapters'].values())
-progress = tqdm(total=total_verses, desc="Uploading verses")
 
 
+    for chapter_num, verses in chapters.items():
+        parsed_verses = parsed['chapters'].get(chapter_num, {}).get('verses', {})
+        # Reference to chapter doc
+        chapter_ref = db.collection('bibles').document(language).collection(version).document(book_name).collection('chapters').document(str(chapter_num))
+        # Render-ready structure and denormalized verses, served by /get_chapter
+        chapter_ref.set(build_chapter_document(chapter_num, verses, structures.get(chapter_num, [])))
 
-for chapter_num, chapter_data in parsed['chapters'].items():
-    # Reference to chapter doc
-    chapter_ref = db.collection('bibles').document(language).collection(version).document(book_name).collection('chapters').document(str(chapter_num))
-    chapter_ref.set({})  # Optional: store chapter-level info here
-    
-    batch = db.batch()
-    count = 0
-    for verse_num, verse_data in chapter_data['verses'].items():
-        verse_ref = chapter_ref.collection('verses').document(str(verse_num))
-        batch.set(verse_ref, verse_data)
-        count += 1
-        progress.update(1)  # Advance progress bar
-        if count % 500 == 0:
+        batch = db.batch()
+        count = 0
+        for verse_num, text in verses.items():
+            verse_data = {'blocks_before': [], **parsed_verses.get(verse_num, {}), 'text': text}
+            verse_ref = chapter_ref.collection('verses').document(str(verse_num))
+            batch.set(verse_ref, verse_data)
+            count += 1
+            progress.update(1)  # Advance progress bar
+            if count % 500 == 0:
+                batch.commit()
+                batch = db.batch()
+        if count % 500 != 0:
             batch.commit()
-            batch = db.batch()
-    if count % 500 != 0:
-        batch.commit()
-        
-progress.close()
-print("Upload complete!")
+
+    progress.close()
+    bump_bible_generation(db, language, version)
+    print("Upload complete!")
+
+
+if __name__ == "__main__":
+    main()